@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+DREAMSCAPE Monitoring Analyzer Registry
+Declares analyzers with their inputs and dependencies and runs them as a DAG
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Any, Iterable, Tuple
+
+
+@dataclass
+class Analyzer:
+    """Analyzer definition: a callable plus the analyzers whose results it consumes
+
+    ``optional`` dependencies are ordered and pulled in like ``depends_on`` ones,
+    but skipping them passes None instead of dropping this analyzer.
+    """
+    name: str
+    func: Callable[..., Dict[str, Any]]
+    depends_on: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()
+    description: str = ""
+    optional: Tuple[str, ...] = ()
+
+    @property
+    def all_dependencies(self) -> Tuple[str, ...]:
+        """Required and optional dependencies together"""
+        return self.depends_on + self.optional
+
+
+@dataclass
+class AnalyzerRun:
+    """Results and per-analyzer wall time of one registry run"""
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+
+
+class AnalyzerRegistry:
+    """Registry of analyzers executed concurrently in dependency order
+
+    Each analyzer is called as ``func(target, **dependency_results)`` where the
+    keyword names are the analyzer's ``depends_on`` and ``optional`` entries;
+    optional ones that did not run are passed as None. Analyzers import
+    their heavy dependencies inside ``func`` so that unselected ones cost nothing.
+    """
+
+    def __init__(self):
+        self._analyzers: Dict[str, Analyzer] = {}
+
+    def register(self, name: str, depends_on: Iterable[str] = (), inputs: Iterable[str] = (),
+                 description: str = "", optional: Iterable[str] = ()) -> Callable:
+        """Decorator registering a function or method as an analyzer"""
+        def decorator(func: Callable) -> Callable:
+            self.add(Analyzer(name, func, tuple(depends_on), tuple(inputs),
+                              description or (func.__doc__ or "").strip().split("\n")[0], tuple(optional)))
+            return func
+        return decorator
+
+    def add(self, analyzer: Analyzer):
+        """Add an analyzer, rejecting duplicate names"""
+        if analyzer.name in self._analyzers:
+            raise ValueError(f"Analyzer already registered: {analyzer.name}")
+        self._analyzers[analyzer.name] = analyzer
+
+    def get(self, name: str) -> Analyzer:
+        """Return a registered analyzer by name"""
+        return self._analyzers[name]
+
+    def names(self) -> List[str]:
+        """Return every registered analyzer name in registration order"""
+        return list(self._analyzers)
+
+    def select(self, only: Optional[Iterable[str]] = None,
+               skip: Optional[Iterable[str]] = None) -> Tuple[List[str], List[str]]:
+        """Resolve an --only/--skip selection into a topological order
+
+        ``only`` pulls in the transitive dependencies of the named analyzers;
+        ``skip`` removes the named analyzers and everything that requires them;
+        analyzers that only depend on a skipped one optionally still run.
+        Returns the ordered selection and the analyzers dropped because of ``skip``.
+        """
+        only = list(only or [])
+        skip = set(skip or [])
+        unknown = [name for name in list(only) + list(skip) if name not in self._analyzers]
+        if unknown:
+            raise ValueError(f"Unknown analyzer(s): {', '.join(unknown)}. Available: {', '.join(self.names())}")
+
+        selected = set()
+        pending = list(only) if only else self.names()
+        while pending:
+            name = pending.pop()
+            if name not in selected:
+                selected.add(name)
+                pending.extend(self._analyzers[name].all_dependencies)
+
+        order = self._topological_order(selected)
+        dropped = []
+        for name in order:
+            if name in skip or any(dep in dropped for dep in self._analyzers[name].depends_on):
+                dropped.append(name)
+        return [name for name in order if name not in dropped], dropped
+
+    def _topological_order(self, names: Iterable[str]) -> List[str]:
+        """Order analyzers so dependencies come first, keeping registration order for ties"""
+        names = set(names)
+        order: List[str] = []
+        visiting = set()
+
+        def visit(name: str):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Analyzer dependency cycle through: {name}")
+            visiting.add(name)
+            for dep in self._analyzers[name].all_dependencies:
+                if dep not in self._analyzers:
+                    raise ValueError(f"Analyzer {name} depends on unknown analyzer {dep}")
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.names():
+            if name in names:
+                visit(name)
+        return order
+
+    def run(self, target: Any, only: Optional[Iterable[str]] = None, skip: Optional[Iterable[str]] = None,
+            max_workers: int = 4, logger: Optional[logging.Logger] = None) -> AnalyzerRun:
+        """Run the selected analyzers, starting each one as soon as its dependencies finish"""
+        logger = logger or logging.getLogger(__name__)
+        order, dropped = self.select(only, skip)
+        run = AnalyzerRun(skipped=dropped)
+        remaining = {name: set(self._analyzers[name].all_dependencies) & set(order) for name in order}
+
+        def execute(name: str) -> Tuple[str, Any, float]:
+            analyzer = self._analyzers[name]
+            started = time.perf_counter()
+            try:
+                kwargs = {dep: run.results[dep] for dep in analyzer.depends_on}
+                kwargs.update({dep: run.results.get(dep) for dep in analyzer.optional})
+                result = analyzer.func(target, **kwargs)
+            except Exception as e:
+                logger.error(f"Analyzer {name} failed: {e}")
+                result = {"error": str(e)}
+            return name, result, time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            running = set()
+
+            def submit_ready():
+                for name in [n for n, deps in remaining.items() if not deps]:
+                    del remaining[name]
+                    running.add(executor.submit(execute, name))
+
+            submit_ready()
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, result, elapsed = future.result()
+                    run.results[name] = result
+                    run.timings[name] = round(elapsed, 4)
+                    for deps in remaining.values():
+                        deps.discard(name)
+                submit_ready()
+
+        return run
@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+"""
+DREAMSCAPE Cluster Capacity Planner
+Combines k8s requests, limits, overlay replicas and HPAs with k3s node pools
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+import yaml
+
+# libyaml's loader is several times faster on large manifest trees when available
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+WORKLOAD_KINDS = {"Deployment", "StatefulSet"}
+KUSTOMIZATION_FILES = ("kustomization.yaml", "kustomization.yml", "Kustomization")
+
+CPU_QUANTITY_RE = re.compile(r"^([0-9.]+)(m?)$")
+MEMORY_QUANTITY_RE = re.compile(r"^([0-9.]+(?:[eE][0-9]+)?)([KMGTPE]i?|k)?$")
+MEMORY_UNITS = {
+    None: 1, "k": 1000, "K": 1000, "M": 1000 ** 2, "G": 1000 ** 3, "T": 1000 ** 4, "P": 1000 ** 5, "E": 1000 ** 6,
+    "Ki": 1024, "Mi": 1024 ** 2, "Gi": 1024 ** 3, "Ti": 1024 ** 4, "Pi": 1024 ** 5, "Ei": 1024 ** 6
+}
+MIB = 1024 ** 2
+GIB = 1024 ** 3
+
+# Ampere (Arm) OCI shapes expose one vCPU per OCPU, x86 shapes expose two
+ARM_SHAPE_MARKERS = ("A1", "A2")
+
+DEFAULT_NODE_RESERVED = {"cpu": "100m", "memory": "512Mi"}
+DEFAULT_MAX_CPU_LIMIT_RATIO = 2.0
+DEFAULT_MAX_MEMORY_LIMIT_RATIO = 2.0
+
+HCL_BLOCK_RE = re.compile(r'^(variable|resource)\s+"([^"]+)"(?:\s+"([^"]+)")?\s*\{', re.MULTILINE)
+HCL_ATTRIBUTE_RE = re.compile(r'^\s*(\w+)\s*=\s*(.+?)\s*$', re.MULTILINE)
+
+
+def parse_cpu(value: Any) -> int:
+    """Convert a CPU quantity (``250m``, ``0.5``, ``2``) into millicores"""
+    if value is None:
+        return 0
+    match = CPU_QUANTITY_RE.match(str(value).strip())
+    if not match:
+        return 0
+    number = float(match.group(1))
+    return int(round(number if match.group(2) else number * 1000))
+
+
+def parse_memory(value: Any) -> int:
+    """Convert a memory quantity (``256Mi``, ``1G``, ``512``) into bytes"""
+    if value is None:
+        return 0
+    match = MEMORY_QUANTITY_RE.match(str(value).strip())
+    if not match:
+        return 0
+    return int(float(match.group(1)) * MEMORY_UNITS[match.group(2)])
+
+
+@dataclass
+class PodShape:
+    """Effective requests and limits of one pod"""
+    cpu_request: int = 0
+    memory_request: int = 0
+    cpu_limit: int = 0
+    memory_limit: int = 0
+    containers_without_requests: List[str] = field(default_factory=list)
+    containers_without_limits: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Workload:
+    """A scalable workload as rendered for one environment"""
+    environment: str
+    kind: str
+    name: str
+    namespace: Optional[str]
+    replicas: int
+    pod: PodShape
+    hpa_min: Optional[int] = None
+    hpa_max: Optional[int] = None
+
+    @property
+    def current_replicas(self) -> int:
+        """Replicas scheduled at rest: the HPA never goes below its minimum"""
+        return max(self.replicas, self.hpa_min or 0)
+
+    @property
+    def max_replicas(self) -> int:
+        """Replicas scheduled at full HPA scale-out"""
+        return max(self.current_replicas, self.hpa_max or 0)
+
+
+@dataclass
+class NodePool:
+    """A group of identical k3s nodes declared in terraform"""
+    name: str
+    count: int
+    shape: str
+    ocpus: float
+    memory_gb: float
+    reserved_cpu: int
+    reserved_memory: int
+
+    @property
+    def vcpus(self) -> float:
+        """vCPUs per node for the OCI shape"""
+        per_ocpu = 1 if any(marker in self.shape for marker in ARM_SHAPE_MARKERS) else 2
+        return self.ocpus * per_ocpu
+
+    @property
+    def allocatable_cpu(self) -> int:
+        """Millicores per node left for pods"""
+        return max(0, int(self.vcpus * 1000) - self.reserved_cpu)
+
+    @property
+    def allocatable_memory(self) -> int:
+        """Bytes per node left for pods"""
+        return max(0, int(self.memory_gb * GIB) - self.reserved_memory)
+
+
+def pod_shape(pod_spec: Dict[str, Any]) -> PodShape:
+    """Effective pod requests/limits: containers are summed, init containers take the max"""
+    shape = PodShape()
+    for container in pod_spec.get("containers") or []:
+        resources = container.get("resources") or {}
+        requests, limits = resources.get("requests") or {}, resources.get("limits") or {}
+        shape.cpu_request += parse_cpu(requests.get("cpu"))
+        shape.memory_request += parse_memory(requests.get("memory"))
+        shape.cpu_limit += parse_cpu(limits.get("cpu"))
+        shape.memory_limit += parse_memory(limits.get("memory"))
+        if not requests:
+            shape.containers_without_requests.append(container.get("name", "?"))
+        if not limits:
+            shape.containers_without_limits.append(container.get("name", "?"))
+
+    for container in pod_spec.get("initContainers") or []:
+        resources = container.get("resources") or {}
+        requests, limits = resources.get("requests") or {}, resources.get("limits") or {}
+        shape.cpu_request = max(shape.cpu_request, parse_cpu(requests.get("cpu")))
+        shape.memory_request = max(shape.memory_request, parse_memory(requests.get("memory")))
+        shape.cpu_limit = max(shape.cpu_limit, parse_cpu(limits.get("cpu")))
+        shape.memory_limit = max(shape.memory_limit, parse_memory(limits.get("memory")))
+    return shape
+
+
+def _clone(node: Any) -> Any:
+    """Copy parsed YAML (dicts, lists and scalars) much faster than copy.deepcopy"""
+    if isinstance(node, dict):
+        return {key: _clone(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_clone(value) for value in node]
+    return node
+
+
+def _patch_index(key: str, size: int, path: str) -> int:
+    """Parse a JSON pointer array index, rejecting anything outside the array"""
+    if not key.isdigit():
+        raise ValueError(f"invalid array index {key!r} in {path}")
+    if int(key) >= size:
+        raise IndexError(f"array index {key} out of range in {path}")
+    return int(key)
+
+
+def _apply_json_patch(doc: Dict[str, Any], operations: List[Dict[str, Any]]):
+    """Apply RFC 6902 add/replace/remove operations in place
+
+    Like kustomize, a missing intermediate path, or a replace/remove of a
+    missing member, is an error rather than something to create.
+    """
+    for operation in operations:
+        op, path = operation.get("op"), operation["path"]
+        if op not in ("add", "replace", "remove"):
+            raise ValueError(f"unsupported JSON patch op {op!r} on {path}")
+        parts = [p.replace("~1", "/").replace("~0", "~") for p in path.lstrip("/").split("/")]
+        parent: Any = doc
+        for part in parts[:-1]:
+            if isinstance(parent, list):
+                parent = parent[_patch_index(part, len(parent), path)]
+            elif isinstance(parent, dict) and part in parent:
+                parent = parent[part]
+            else:
+                raise KeyError(f"{path}: no {part!r} to descend into")
+        key = parts[-1]
+        if isinstance(parent, list):
+            if op == "add" and key == "-":
+                parent.append(operation.get("value"))
+            elif op == "add":
+                parent.insert(_patch_index(key, len(parent) + 1, path), operation.get("value"))
+            elif op == "remove":
+                del parent[_patch_index(key, len(parent), path)]
+            else:
+                parent[_patch_index(key, len(parent), path)] = operation.get("value")
+        elif isinstance(parent, dict):
+            if op != "add" and key not in parent:
+                raise KeyError(f"{path} does not exist")
+            if op == "remove":
+                del parent[key]
+            else:
+                parent[key] = operation.get("value")
+        else:
+            raise TypeError(f"{path} does not point into an object or array")
+
+
+class KustomizeRenderer:
+    """Renders the subset of kustomize the capacity planner needs
+
+    Resources, namespace, replicas and JSON 6902 patches (``patches`` and the
+    legacy ``patchesJson6902``) are supported; strategic merge patches are
+    reported as warnings. Every manifest file is parsed once and reused across
+    overlays.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.warnings: List[str] = []
+        self.files_read = 0
+        self._cache: Dict[Path, List[Dict[str, Any]]] = {}
+
+    def _load(self, path: Path) -> List[Dict[str, Any]]:
+        """Parse a YAML file once and return deep copies of its documents"""
+        if path not in self._cache:
+            self.files_read += 1
+            with open(path, 'r') as f:
+                try:
+                    self._cache[path] = [d for d in yaml.load_all(f, Loader=YAML_LOADER) if isinstance(d, dict)]
+                except yaml.YAMLError as e:
+                    self.warnings.append(f"Unparsable YAML {path}: {e}")
+                    self._cache[path] = []
+        return [_clone(doc) for doc in self._cache[path]]
+
+    @staticmethod
+    def kustomization_file(directory: Path) -> Optional[Path]:
+        """Return the kustomization file of a directory, if any"""
+        for name in KUSTOMIZATION_FILES:
+            if (directory / name).exists():
+                return directory / name
+        return None
+
+    def render(self, directory: Path) -> List[Dict[str, Any]]:
+        """Render a kustomization directory into its resource documents"""
+        kustomization_path = self.kustomization_file(directory)
+        if kustomization_path is None:
+            return [doc for path in sorted(directory.glob("*.y*ml")) for doc in self._load(path)]
+
+        kustomization = (self._load(kustomization_path) or [{}])[0]
+        docs: List[Dict[str, Any]] = []
+        for resource in kustomization.get("resources") or []:
+            # normpath instead of resolve(): no symlink lookups for every resource
+            target = Path(os.path.normpath(directory / resource))
+            if target.is_dir():
+                docs.extend(self.render(target))
+            elif target.exists():
+                docs.extend(self._load(target))
+            else:
+                self.warnings.append(f"Missing kustomize resource {resource} in {directory}")
+
+        namespace = kustomization.get("namespace")
+        if namespace:
+            for doc in docs:
+                doc.setdefault("metadata", {})["namespace"] = namespace
+
+        replicas = {r.get("name"): r.get("count") for r in kustomization.get("replicas") or []}
+        for doc in docs:
+            name = (doc.get("metadata") or {}).get("name")
+            if doc.get("kind") in WORKLOAD_KINDS and name in replicas:
+                doc.setdefault("spec", {})["replicas"] = replicas[name]
+
+        for patch in kustomization.get("patches") or []:
+            self._apply_patch(directory, patch, docs)
+        for patch in kustomization.get("patchesJson6902") or []:
+            # Legacy field: the target name is literal, not a regex as in ``patches``
+            target = dict(patch.get("target") or {})
+            if target.get("name"):
+                target["name"] = re.escape(target["name"])
+            self._apply_patch(directory, dict(patch, target=target), docs)
+        if kustomization.get("patchesStrategicMerge"):
+            self.warnings.append(f"patchesStrategicMerge is not evaluated ({directory})")
+        return docs
+
+    def _apply_patch(self, directory: Path, patch: Dict[str, Any], docs: List[Dict[str, Any]]):
+        """Apply one kustomize ``patches`` entry to the matching documents"""
+        body = patch.get("patch")
+        if body is None and patch.get("path"):
+            with open(directory / patch["path"], 'r') as f:
+                body = f.read()
+        operations = yaml.load(body, Loader=YAML_LOADER) if isinstance(body, str) else body
+        if not isinstance(operations, list):
+            self.warnings.append(f"Strategic merge patches are not evaluated ({directory})")
+            return
+
+        target = patch.get("target") or {}
+        for doc in docs:
+            metadata = doc.get("metadata") or {}
+            if target.get("kind") and doc.get("kind") != target["kind"]:
+                continue
+            if target.get("name") and not re.fullmatch(target["name"], metadata.get("name", "")):
+                continue
+            # Patch a copy so a failing operation leaves the document as kustomize would: untouched
+            patched = _clone(doc)
+            try:
+                _apply_json_patch(patched, operations)
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                self.warnings.append(f"Patch failed on {doc.get('kind')}/{metadata.get('name')}: {e}")
+                continue
+            doc.clear()
+            doc.update(patched)
+
+
+def _hcl_blocks(text: str) -> List[Tuple[str, str, Optional[str], str]]:
+    """Split HCL into (block type, label, second label, body) tuples by brace matching"""
+    blocks = []
+    for match in HCL_BLOCK_RE.finditer(text):
+        depth, i = 1, match.end()
+        while i < len(text) and depth:
+            depth += {"{": 1, "}": -1}.get(text[i], 0)
+            i += 1
+        blocks.append((match.group(1), match.group(2), match.group(3), text[match.end():i - 1]))
+    return blocks
+
+
+def _hcl_value(raw: str) -> Any:
+    """Convert a literal HCL value into a Python value"""
+    raw = raw.strip()
+    if raw.startswith('"') and raw.endswith('"'):
+        return raw[1:-1]
+    if raw in ("true", "false"):
+        return raw == "true"
+    try:
+        return float(raw) if "." in raw else int(raw)
+    except ValueError:
+        return raw
+
+
+def load_node_pools(module_path: Path, tfvars: Optional[Dict[str, Any]] = None,
+                    reserved: Optional[Dict[str, Dict[str, str]]] = None) -> List[NodePool]:
+    """Read k3s node pools from the terraform module, resolving variables from defaults and tfvars"""
+    variables: Dict[str, Any] = {}
+    resources: List[Tuple[str, str]] = []
+    for tf_file in sorted(module_path.glob("*.tf")):
+        for block_type, label, name, body in _hcl_blocks(tf_file.read_text()):
+            if block_type == "variable":
+                default = re.search(r'^\s*default\s*=\s*(.+?)\s*$', body, re.MULTILINE)
+                if default:
+                    variables[label] = _hcl_value(default.group(1))
+            elif label == "oci_core_instance":
+                resources.append((name, body))
+    variables.update(tfvars or {})
+
+    def resolve(raw: Optional[str], fallback: Any = None) -> Any:
+        if raw is None:
+            return fallback
+        raw = raw.strip()
+        if raw.startswith("var."):
+            return variables.get(raw[4:], fallback)
+        return _hcl_value(raw)
+
+    reserved = reserved or {}
+    pools = []
+    for name, body in resources:
+        attributes = {k: v for k, v in HCL_ATTRIBUTE_RE.findall(body)}
+        pool_reserved = {**DEFAULT_NODE_RESERVED, **reserved.get("default", {}), **reserved.get(name, {})}
+        pools.append(NodePool(
+            name=name,
+            count=int(resolve(attributes.get("count"), 1)),
+            shape=str(resolve(attributes.get("shape"), "")),
+            ocpus=float(resolve(attributes.get("ocpus"), 1)),
+            memory_gb=float(resolve(attributes.get("memory_in_gbs"), 1)),
+            reserved_cpu=parse_cpu(pool_reserved["cpu"]),
+            reserved_memory=parse_memory(pool_reserved["memory"])
+        ))
+    return pools
+
+
+def load_tfvars(path: Optional[Path]) -> Dict[str, Any]:
+    """Read simple ``key = value`` assignments from a tfvars file"""
+    if not path or not path.exists():
+        return {}
+    return {k: _hcl_value(v) for k, v in HCL_ATTRIBUTE_RE.findall(path.read_text())}
+
+
+class CapacityPlanner:
+    """Computes scheduled capacity, HPA headroom and right-sizing risks per environment"""
+
+    def __init__(self, base_path: Path, settings: Optional[Dict[str, Any]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.base_path = Path(base_path)
+        self.settings = settings or {}
+        self.logger = logger or logging.getLogger(__name__)
+        self.renderer = KustomizeRenderer(self.logger)
+        self.max_cpu_ratio = float(self.settings.get("max_cpu_limit_ratio", DEFAULT_MAX_CPU_LIMIT_RATIO))
+        self.max_memory_ratio = float(self.settings.get("max_memory_limit_ratio", DEFAULT_MAX_MEMORY_LIMIT_RATIO))
+
+    def environments(self) -> Dict[str, Path]:
+        """Map each overlay (or the base tree when there are none) to its directory"""
+        overlays = self.base_path / "k8s" / "overlays"
+        found = {d.name: d for d in sorted(overlays.iterdir())
+                 if d.is_dir() and KustomizeRenderer.kustomization_file(d)} if overlays.is_dir() else {}
+        return found or {"base": self.base_path / "k8s" / "base"}
+
+    def workloads(self, environment: str, directory: Path) -> List[Workload]:
+        """Render an environment and pair each workload with its HPA"""
+        if KustomizeRenderer.kustomization_file(directory):
+            docs = self.renderer.render(directory)
+        else:
+            docs = [doc for child in sorted(p for p in directory.iterdir() if p.is_dir())
+                    for doc in self.renderer.render(child)]
+
+        hpas = {}
+        for doc in docs:
+            if doc.get("kind") == "HorizontalPodAutoscaler":
+                spec = doc.get("spec") or {}
+                target = (spec.get("scaleTargetRef") or {}).get("name")
+                hpas[target] = (spec.get("minReplicas", 1), spec.get("maxReplicas"))
+
+        workloads = []
+        for doc in docs:
+            if doc.get("kind") not in WORKLOAD_KINDS:
+                continue
+            metadata, spec = doc.get("metadata") or {}, doc.get("spec") or {}
+            name = metadata.get("name", "?")
+            hpa_min, hpa_max = hpas.get(name, (None, None))
+            workloads.append(Workload(
+                environment=environment, kind=doc["kind"], name=name, namespace=metadata.get("namespace"),
+                replicas=int(spec.get("replicas", 1)),
+                pod=pod_shape(((spec.get("template") or {}).get("spec")) or {}),
+                hpa_min=hpa_min, hpa_max=hpa_max
+            ))
+        return workloads
+
+    @staticmethod
+    def _pack(workloads: List[Workload], pools: List[NodePool]) -> Dict[str, Any]:
+        """First-fit-decreasing placement of every pod at full scale onto the nodes"""
+        nodes = [[pool.allocatable_cpu, pool.allocatable_memory] for pool in pools for _ in range(pool.count)]
+        pods = sorted(((w.pod.cpu_request, w.pod.memory_request, w.name) for w in workloads
+                       for _ in range(w.max_replicas)), reverse=True)
+        unschedulable: Dict[str, int] = {}
+        for cpu, memory, name in pods:
+            for node in nodes:
+                if node[0] >= cpu and node[1] >= memory:
+                    node[0] -= cpu
+                    node[1] -= memory
+                    break
+            else:
+                unschedulable[name] = unschedulable.get(name, 0) + 1
+        return {"unschedulable_pods": sum(unschedulable.values()), "by_workload": unschedulable}
+
+    def _summarize(self, workloads: List[Workload], pools: List[NodePool]) -> Dict[str, Any]:
+        """Aggregate requests, limits and headroom for a set of workloads"""
+        allocatable_cpu = sum(p.allocatable_cpu * p.count for p in pools)
+        allocatable_memory = sum(p.allocatable_memory * p.count for p in pools)
+        largest_cpu = max((p.allocatable_cpu for p in pools), default=0)
+        largest_memory = max((p.allocatable_memory for p in pools), default=0)
+
+        def totals(replicas_of, cpu_of, memory_of) -> Dict[str, int]:
+            return {
+                "cpu_millicores": sum(replicas_of(w) * cpu_of(w) for w in workloads),
+                "memory_mib": sum(replicas_of(w) * memory_of(w) for w in workloads) // MIB
+            }
+
+        requests_max = totals(lambda w: w.max_replicas, lambda w: w.pod.cpu_request, lambda w: w.pod.memory_request)
+        return {
+            "workloads": len(workloads),
+            "pods": {
+                "current": sum(w.current_replicas for w in workloads),
+                "max": sum(w.max_replicas for w in workloads)
+            },
+            "requests": {
+                "current": totals(lambda w: w.current_replicas, lambda w: w.pod.cpu_request,
+                                  lambda w: w.pod.memory_request),
+                "max": requests_max
+            },
+            "limits": {
+                "current": totals(lambda w: w.current_replicas, lambda w: w.pod.cpu_limit,
+                                  lambda w: w.pod.memory_limit),
+                "max": totals(lambda w: w.max_replicas, lambda w: w.pod.cpu_limit, lambda w: w.pod.memory_limit)
+            },
+            "headroom_at_max": {
+                "cpu_millicores": allocatable_cpu - requests_max["cpu_millicores"],
+                "memory_mib": allocatable_memory // MIB - requests_max["memory_mib"],
+                "cpu_percent_used": round(100 * requests_max["cpu_millicores"] / allocatable_cpu, 1)
+                if allocatable_cpu else None,
+                "memory_percent_used": round(100 * requests_max["memory_mib"] * MIB / allocatable_memory, 1)
+                if allocatable_memory else None
+            },
+            "oversized_pods": sorted({
+                w.name for w in workloads
+                if w.pod.cpu_request > largest_cpu or w.pod.memory_request > largest_memory
+            }),
+            "placement_at_max": self._pack(workloads, pools)
+        }
+
+    def _risks(self, workloads: List[Workload]) -> List[Dict[str, Any]]:
+        """Flag workloads whose limits or missing requests risk throttling or eviction"""
+        risks = []
+        for w in workloads:
+            pod = w.pod
+            reasons = []
+            if pod.containers_without_requests:
+                reasons.append("missing_requests")
+            if not pod.cpu_limit:
+                reasons.append("no_cpu_limit")
+            cpu_ratio = pod.cpu_limit / pod.cpu_request if pod.cpu_request and pod.cpu_limit else None
+            memory_ratio = pod.memory_limit / pod.memory_request if pod.memory_request and pod.memory_limit else None
+            if cpu_ratio and cpu_ratio > self.max_cpu_ratio:
+                reasons.append("cpu_limit_request_ratio")
+            if memory_ratio and memory_ratio > self.max_memory_ratio:
+                reasons.append("memory_limit_request_ratio")
+            if reasons:
+                risks.append({
+                    "environment": w.environment,
+                    "workload": w.name,
+                    "cpu_request_millicores": pod.cpu_request,
+                    "cpu_limit_millicores": pod.cpu_limit,
+                    "cpu_limit_ratio": round(cpu_ratio, 2) if cpu_ratio else None,
+                    "memory_limit_ratio": round(memory_ratio, 2) if memory_ratio else None,
+                    "reasons": reasons
+                })
+        return risks
+
+    def analyze(self) -> Dict[str, Any]:
+        """Build the capacity report for every environment and for all of them combined"""
+        module_path = self.base_path / "terraform" / "modules" / "k3s"
+        tfvars_path = self.settings.get("tfvars")
+        pools = load_node_pools(
+            module_path,
+            load_tfvars(self.base_path / tfvars_path if tfvars_path else None),
+            self.settings.get("node_reserved")
+        )
+
+        environments: Dict[str, Dict[str, Any]] = {}
+        all_workloads: List[Workload] = []
+        for environment, directory in self.environments().items():
+            workloads = self.workloads(environment, directory)
+            all_workloads.extend(workloads)
+            environments[environment] = self._summarize(workloads, pools)
+
+        return {
+            "node_pools": [{
+                "name": p.name,
+                "count": p.count,
+                "shape": p.shape,
+                "vcpus_per_node": p.vcpus,
+                "memory_gb_per_node": p.memory_gb,
+                "allocatable_per_node": {"cpu_millicores": p.allocatable_cpu, "memory_mib": p.allocatable_memory // MIB}
+            } for p in pools],
+            "environments": environments,
+            "all_environments": self._summarize(all_workloads, pools),
+            "throttling_risks": self._risks(all_workloads),
+            "warnings": sorted(set(self.renderer.warnings)),
+            "files_read": self.renderer.files_read
+        }
+
+
+def main():
+    """Print the capacity report for this repository"""
+    parser = argparse.ArgumentParser(description="Cluster capacity and right-sizing report")
+    parser.add_argument("--base-path", default=str(Path(__file__).parent.parent), help="Infra repository root")
+    parser.add_argument("--config", default=str(Path(__file__).parent / "config" / "monitoring-config.json"),
+                        help="Monitoring configuration providing the capacity settings")
+    parser.add_argument("--tfvars", help="tfvars file (relative to the repository root) overriding k3s defaults")
+    args = parser.parse_args()
+
+    # Same settings as the monitor's capacity analyzer, so both report identical numbers
+    try:
+        with open(args.config, 'r') as f:
+            settings = json.load(f).get("monitoring_config", {}).get("capacity", {})
+    except FileNotFoundError:
+        settings = {}
+    if args.tfvars:
+        settings["tfvars"] = args.tfvars
+
+    planner = CapacityPlanner(Path(args.base_path), settings)
+    json.dump(planner.analyze(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,24 +4,33 @@ DREAMSCAPE Database Migration Monitoring System
 Monitors database configuration changes and migration patterns
 """
 
+import argparse
 import json
 import os
 import sys
 import logging
-import requests
-import yaml
 import hashlib
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
-import subprocess
+
+from analyzer_registry import AnalyzerRegistry
+
+# Heavy dependencies (yaml, aiohttp, database drivers) are imported inside the
+# analyzers that need them so a partial --only run does not pay for the rest.
+ANALYZERS = AnalyzerRegistry()
+
+# Analyzers whose results are grouped under infrastructure_analysis in the report
+INFRASTRUCTURE_ANALYZERS = ("terraform", "kubernetes", "live_databases")
 
 class DatabaseMigrationMonitor:
-    def __init__(self, config_path: str = None):
+    def __init__(self, config_path: str = None, max_workers: int = 4, base_path: Optional[Path] = None):
         self.config_path = config_path or Path(__file__).parent / "config" / "monitoring-config.json"
-        self.base_path = Path(__file__).parent.parent
-        self.log_dir = Path(__file__).parent / "logs"
-        self.reports_dir = Path(__file__).parent / "reports"
+        self.base_path = Path(base_path) if base_path else Path(__file__).parent.parent
+        monitoring_dir = self.base_path / "monitoring"
+        self.log_dir = monitoring_dir / "logs"
+        self.reports_dir = monitoring_dir / "reports"
+        self.state_dir = monitoring_dir / "state"
         
         # Create directories
         self.log_dir.mkdir(exist_ok=True)
@@ -41,6 +50,7 @@ class DatabaseMigrationMonitor:
         
         # Load configuration
         self.config = self._load_config()
+        self.max_workers = max_workers
         
     def _load_config(self) -> Dict[str, Any]:
         """Load monitoring configuration"""
@@ -69,6 +79,7 @@ class DatabaseMigrationMonitor:
             }
         }
     
+    @ANALYZERS.register("terraform", inputs=("terraform/modules/databases/main.tf",))
     def analyze_terraform_database_config(self) -> Dict[str, Any]:
         """Analyze Terraform database configuration"""
         terraform_db_path = self.base_path / "terraform" / "modules" / "databases" / "main.tf"
@@ -159,6 +170,7 @@ class DatabaseMigrationMonitor:
                 return line.split('=')[1].strip().replace('"', '')
         return 'unknown'
     
+    @ANALYZERS.register("kubernetes", inputs=("k8s/base/auth/deployment.yaml",))
     def analyze_kubernetes_auth_config(self) -> Dict[str, Any]:
         """Analyze Kubernetes auth service configuration"""
         auth_deployment_path = self.base_path / "k8s" / "base" / "auth" / "deployment.yaml"
@@ -168,6 +180,8 @@ class DatabaseMigrationMonitor:
             return {}
         
         try:
+            import yaml
+
             with open(auth_deployment_path, 'r') as f:
                 content = f.read()
                 
@@ -278,11 +292,29 @@ class DatabaseMigrationMonitor:
             
         return health_checks
     
-    def check_migration_patterns(self) -> Dict[str, Any]:
+    @ANALYZERS.register("live_databases")
+    def collect_live_database_metrics(self) -> Dict[str, Any]:
+        """Probe live databases for health, sizes and migration progress"""
+        monitoring_config = self.config.get("monitoring_config", {})
+        if not monitoring_config.get("live_probes", {}).get("enabled", False):
+            return {"enabled": False}
+        
+        try:
+            import asyncio
+            from database_probe import DatabaseProbeCollector
+
+            collector = DatabaseProbeCollector(monitoring_config, self.logger)
+            return asyncio.run(collector.collect())
+        except Exception as e:
+            self.logger.error(f"Error collecting live database metrics: {e}")
+            return {"error": str(e)}
+    
+    @ANALYZERS.register("migration_patterns", depends_on=("readiness",))
+    def check_migration_patterns(self, readiness: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Check for database migration patterns and trends"""
         migration_analysis = {
             "current_architecture": "hybrid_multi_database",
-            "migration_readiness": self._assess_migration_readiness(),
+            "migration_readiness": readiness if readiness is not None else self._assess_migration_readiness(),
             "technology_trends": {
                 "postgresql_adoption": {
                     "trend": "increasing",
@@ -308,7 +340,10 @@ class DatabaseMigrationMonitor:
         
         return migration_analysis
     
-    def _assess_migration_readiness(self) -> Dict[str, Any]:
+    @ANALYZERS.register("readiness", depends_on=("terraform", "kubernetes"), optional=("live_databases",))
+    def _assess_migration_readiness(self, terraform: Optional[Dict[str, Any]] = None,
+                                    kubernetes: Optional[Dict[str, Any]] = None,
+                                    live_databases: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Assess readiness for database migration"""
         readiness = {
             "score": 0,
@@ -316,9 +351,9 @@ class DatabaseMigrationMonitor:
             "recommendations": []
         }
         
-        # Check current infrastructure
-        terraform_analysis = self.analyze_terraform_database_config()
-        k8s_analysis = self.analyze_kubernetes_auth_config()
+        # Check current infrastructure, reusing results the registry already computed
+        terraform_analysis = terraform if terraform is not None else self.analyze_terraform_database_config()
+        k8s_analysis = kubernetes if kubernetes is not None else self.analyze_kubernetes_auth_config()
         
         # Score based on current setup
         if terraform_analysis.get("database_resources", {}).get("postgresql", {}).get("enabled"):
@@ -353,6 +388,26 @@ class DatabaseMigrationMonitor:
         else:
             readiness["recommendations"].append("Improve security configuration")
         
+        # Live database health, only when the live_databases analyzer ran; never probe from here
+        live_metrics = live_databases or {}
+        if live_metrics.get("databases"):
+            from database_probe import summarize_probe_health
+
+            probe_config = self.config.get("monitoring_config", {}).get("live_probes", {})
+            health = summarize_probe_health(live_metrics, float(probe_config.get("max_replication_lag_seconds", 30)))
+            readiness["factors"]["live_databases"] = health
+            
+            if health["unreachable"]:
+                readiness["score"] -= 10
+                readiness["recommendations"].append(f"Restore connectivity to {', '.join(health['unreachable'])}")
+            if health["lagging"]:
+                readiness["score"] -= 10
+                readiness["recommendations"].append(f"Reduce replication lag on {', '.join(health['lagging'])}")
+            if health["failed_migrations"]:
+                readiness["score"] -= 10
+                readiness["recommendations"].append(f"Resolve failed migrations: {', '.join(health['failed_migrations'])}")
+            readiness["score"] = max(readiness["score"], 0)
+        
         # Determine readiness level
         if readiness["score"] >= 80:
             readiness["level"] = "high"
@@ -363,23 +418,122 @@ class DatabaseMigrationMonitor:
             
         return readiness
     
-    def generate_migration_report(self) -> Dict[str, Any]:
+    @ANALYZERS.register("repository_activity")
+    def watch_github_activity(self) -> Dict[str, Any]:
+        """Poll configured GitHub repositories for new PRs, commits and keyword matches"""
+        monitoring_config = self.config.get("monitoring_config", {})
+        if not monitoring_config.get("github_watcher", {}).get("enabled", False):
+            return {"enabled": False}
+
+        try:
+            import asyncio
+            from github_watcher import GitHubWatcher
+
+            watcher = GitHubWatcher(monitoring_config, self.state_dir / "github-watcher.json", self.logger)
+            return asyncio.run(watcher.run())
+        except Exception as e:
+            self.logger.error(f"Error watching GitHub repositories: {e}")
+            return {"error": str(e)}
+    
+    @ANALYZERS.register("promql_cost", inputs=("monitoring/prometheus", "monitoring/rules", "monitoring/grafana"))
+    def analyze_promql_cost(self) -> Dict[str, Any]:
+        """Estimate Prometheus rule and Grafana query cost"""
+        settings = self.config.get("monitoring_config", {}).get("promql_cost", {})
+        
+        try:
+            from promql_cost_analyzer import CardinalitySnapshot, PromQLCostAnalyzer
+
+            snapshot_path = settings.get("cardinality_snapshot")
+            snapshot = CardinalitySnapshot.load(self.base_path / "monitoring" / snapshot_path if snapshot_path else None)
+            analyzer = PromQLCostAnalyzer(
+                self.base_path / "monitoring", snapshot,
+                default_series=int(settings.get("default_series", 100)),
+                top_n=int(settings.get("top_n", 20)),
+                logger=self.logger
+            )
+            analysis = analyzer.analyze()
+            self.logger.info(f"PromQL cost analyzed: {sum(analysis['expressions'].values())} expressions")
+            return analysis
+        except Exception as e:
+            self.logger.error(f"Error analyzing PromQL cost: {e}")
+            return {"error": str(e)}
+    
+    @ANALYZERS.register("capacity", inputs=("k8s", "terraform/modules/k3s"))
+    def analyze_cluster_capacity(self) -> Dict[str, Any]:
+        """Compare scheduled k8s requests at full HPA scale with k3s node capacity"""
+        settings = self.config.get("monitoring_config", {}).get("capacity", {})
+        
+        try:
+            from capacity_planner import CapacityPlanner
+            
+            analysis = CapacityPlanner(self.base_path, settings, logger=self.logger).analyze()
+            unschedulable = analysis["all_environments"]["placement_at_max"]["unschedulable_pods"]
+            self.logger.info(f"Cluster capacity analyzed: {unschedulable} pods unschedulable at max scale")
+            return analysis
+        except Exception as e:
+            self.logger.error(f"Error analyzing cluster capacity: {e}")
+            return {"error": str(e)}
+    
+    @ANALYZERS.register("kafka_coverage", inputs=("monitoring/kafka-jmx-config.yml", "monitoring/rules", "monitoring/grafana"))
+    def analyze_kafka_coverage(self) -> Dict[str, Any]:
+        """Cross-check Kafka JMX exports against alert rules and dashboards"""
+        settings = self.config.get("monitoring_config", {}).get("kafka_coverage", {})
+        
+        try:
+            from kafka_coverage_analyzer import CardinalitySnapshot, KafkaCoverageAnalyzer
+            
+            monitoring_dir = self.base_path / "monitoring"
+            jmx_config = settings.get("jmx_config", "kafka-jmx-config.yml")
+            if not (monitoring_dir / jmx_config).exists():
+                self.logger.warning(f"Kafka JMX exporter config not found: {monitoring_dir / jmx_config}")
+                return {}
+            
+            snapshot_path = settings.get("cardinality_snapshot")
+            analyzer = KafkaCoverageAnalyzer(
+                monitoring_dir, jmx_config,
+                CardinalitySnapshot.load(monitoring_dir / snapshot_path if snapshot_path else None),
+                metric_prefixes=tuple(settings.get("metric_prefixes", ["kafka_"])),
+                external_prefixes=tuple(settings.get("external_prefixes", [])),
+                logger=self.logger
+            )
+            analysis = analyzer.analyze()
+            self.logger.info(f"Kafka coverage analyzed: {len(analysis['coverage']['missing'])} missing metrics, "
+                             f"{len(analysis['dead_rules'])} dead JMX rules")
+            return analysis
+        except Exception as e:
+            self.logger.error(f"Error analyzing Kafka coverage: {e}")
+            return {"error": str(e)}
+    
+    def generate_migration_report(self, only: Optional[List[str]] = None,
+                                  skip: Optional[List[str]] = None) -> Dict[str, Any]:
         """Generate comprehensive database migration monitoring report"""
         timestamp = datetime.utcnow().isoformat() + "Z"
         
-        report = {
-            "migration_monitoring_report": {
-                "timestamp": timestamp,
-                "version": "1.0.0",
-                "infrastructure_analysis": {
-                    "terraform": self.analyze_terraform_database_config(),
-                    "kubernetes": self.analyze_kubernetes_auth_config()
-                },
-                "migration_patterns": self.check_migration_patterns(),
-                "recommendations": self._generate_recommendations(),
-                "next_steps": self._generate_next_steps()
+        # Run the selected analyzers concurrently in dependency order
+        run = ANALYZERS.run(self, only=only, skip=skip, max_workers=self.max_workers, logger=self.logger)
+        results = run.results
+        
+        body = {
+            "timestamp": timestamp,
+            "version": "1.0.0",
+            "infrastructure_analysis": {
+                name: results[name] for name in INFRASTRUCTURE_ANALYZERS if name in results
             }
         }
+        for name, result in results.items():
+            if name in INFRASTRUCTURE_ANALYZERS or name == "readiness":
+                continue
+            body[name] = result
+        if "readiness" in results:
+            body.setdefault("migration_patterns", {})["migration_readiness"] = results["readiness"]
+        body["recommendations"] = self._generate_recommendations()
+        body["next_steps"] = self._generate_next_steps()
+        body["analyzers"] = {
+            "executed": list(run.timings),
+            "skipped": run.skipped,
+            "timings_seconds": run.timings
+        }
+        report = {"migration_monitoring_report": body}
         
         # Save report
         report_file = self.reports_dir / f"db-migration-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
@@ -415,22 +569,56 @@ class DatabaseMigrationMonitor:
             "Schedule regular reviews of migration progress and adjustments"
         ]
     
-    def run_monitoring_cycle(self) -> Dict[str, Any]:
+    def run_monitoring_cycle(self, only: Optional[List[str]] = None,
+                             skip: Optional[List[str]] = None) -> Dict[str, Any]:
         """Run complete monitoring cycle"""
         self.logger.info("Starting database migration monitoring cycle")
         
         try:
-            report = self.generate_migration_report()
+            report = self.generate_migration_report(only=only, skip=skip)
             self.logger.info("Database migration monitoring completed successfully")
             return report
         except Exception as e:
             self.logger.error(f"Error during monitoring cycle: {e}")
             return {"error": str(e)}
 
+def _split_names(values: Optional[List[str]]) -> List[str]:
+    """Flatten repeated and comma-separated analyzer names"""
+    return [name.strip() for value in values or [] for name in value.split(",") if name.strip()]
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="DREAMSCAPE database migration monitor")
+    parser.add_argument("--config", help="Path to monitoring-config.json")
+    parser.add_argument("--only", action="append", metavar="ANALYZER",
+                        help="Run only these analyzers and their dependencies (repeatable or comma-separated)")
+    parser.add_argument("--skip", action="append", metavar="ANALYZER",
+                        help="Skip these analyzers and everything that depends on them")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum analyzers run concurrently")
+    parser.add_argument("--list", action="store_true", help="List registered analyzers and exit")
+    return parser.parse_args(argv)
+
 def main():
     """Main execution function"""
-    monitor = DatabaseMigrationMonitor()
-    report = monitor.run_monitoring_cycle()
+    args = parse_args()
+    if args.list:
+        for name in ANALYZERS.names():
+            analyzer = ANALYZERS.get(name)
+            depends = f" (depends on: {', '.join(analyzer.depends_on)})" if analyzer.depends_on else ""
+            if analyzer.optional:
+                depends += f" (optional: {', '.join(analyzer.optional)})"
+            print(f"{name:<22}{analyzer.description}{depends}")
+        return
+    
+    only, skip = _split_names(args.only), _split_names(args.skip)
+    try:
+        ANALYZERS.select(only, skip)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    
+    monitor = DatabaseMigrationMonitor(args.config, max_workers=args.workers)
+    report = monitor.run_monitoring_cycle(only=only, skip=skip)
     
     # Print summary
     print(f"\n{'='*60}")
@@ -439,6 +627,8 @@ def main():
     print(f"Timestamp: {report.get('migration_monitoring_report', {}).get('timestamp', 'N/A')}")
     print(f"Infrastructure Status: {'Analyzed' if 'infrastructure_analysis' in report.get('migration_monitoring_report', {}) else 'Error'}")
     print(f"Migration Readiness: {report.get('migration_monitoring_report', {}).get('migration_patterns', {}).get('migration_readiness', {}).get('level', 'Unknown')}")
+    for name, elapsed in report.get('migration_monitoring_report', {}).get('analyzers', {}).get('timings_seconds', {}).items():
+        print(f"  {name:<22}{elapsed * 1000:8.1f} ms")
     print(f"{'='*60}")
 
 if __name__ == "__main__":
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+DREAMSCAPE Live Database Probe Collector
+Samples PostgreSQL, MongoDB and Redis health and migration progress concurrently
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+# Migration history tables written by the schema tools we use or plan to use
+POSTGRES_MIGRATION_TABLES = {
+    "flyway": "flyway_schema_history",
+    "prisma": "_prisma_migrations"
+}
+
+# Collection written by migrate-mongo
+MONGODB_CHANGELOG_COLLECTION = "changelog"
+
+# replSetGetStatus errors that mean the server simply is not a replica set member
+MONGODB_STANDALONE_ERRORS = {76: "NoReplicationEnabled", 94: "NotYetInitialized"}
+
+
+class DatabaseProbeCollector:
+    """Connects to each configured database under a strict timeout and samples live stats"""
+
+    def __init__(self, config: Dict[str, Any], logger: Optional[logging.Logger] = None):
+        self.settings = config.get("live_probes", {})
+        self.logger = logger or logging.getLogger(__name__)
+        self.timeout = float(self.settings.get("timeout_seconds", 5))
+        self.pool_size = int(self.settings.get("pool_size", 3))
+        self.top_n = int(self.settings.get("top_relations", 10))
+        self.targets = self.settings.get("targets", {})
+
+    def _target_url(self, name: str) -> Optional[str]:
+        """Resolve a connection URL from the environment, never from the config file"""
+        env_name = self.targets.get(name, {}).get("url_env")
+        return os.environ.get(env_name) if env_name else None
+
+    async def _probe_postgresql(self, url: str) -> Dict[str, Any]:
+        """Sample schema versions, relation sizes and replication lag from PostgreSQL"""
+        import asyncpg
+
+        pool = await asyncpg.create_pool(url, min_size=1, max_size=self.pool_size, command_timeout=self.timeout)
+        try:
+            async def migrations(tool: str, table: str) -> Optional[Dict[str, Any]]:
+                async with pool.acquire() as conn:
+                    if not await conn.fetchval("SELECT to_regclass($1::text) IS NOT NULL", table):
+                        return None
+                    if tool == "flyway":
+                        row = await conn.fetchrow(
+                            "SELECT count(*) AS applied, count(*) FILTER (WHERE NOT success) AS failed, "
+                            "(SELECT version FROM flyway_schema_history WHERE success AND version IS NOT NULL "
+                            " ORDER BY installed_rank DESC LIMIT 1) AS current_version "
+                            "FROM flyway_schema_history"
+                        )
+                        return dict(row)
+                    # A failed Prisma migration has neither timestamp and its error in logs; rolled_back_at
+                    # is only set once the failure was resolved, so those rows are ignored
+                    row = await conn.fetchrow(
+                        "SELECT count(*) FILTER (WHERE finished_at IS NOT NULL AND rolled_back_at IS NULL) AS applied, "
+                        "count(*) FILTER (WHERE finished_at IS NULL AND rolled_back_at IS NULL AND logs IS NOT NULL) AS failed, "
+                        "(SELECT migration_name FROM _prisma_migrations WHERE finished_at IS NOT NULL "
+                        " ORDER BY finished_at DESC LIMIT 1) AS current_version "
+                        "FROM _prisma_migrations"
+                    )
+                    return dict(row)
+
+            async def relations() -> Dict[str, Any]:
+                async with pool.acquire() as conn:
+                    total = await conn.fetchval("SELECT pg_database_size(current_database())")
+                    rows = await conn.fetch(
+                        "SELECT schemaname || '.' || relname AS name, pg_total_relation_size(relid) AS bytes, "
+                        "n_live_tup AS rows FROM pg_stat_user_tables ORDER BY bytes DESC LIMIT $1",
+                        self.top_n
+                    )
+                    count = await conn.fetchval("SELECT count(*) FROM pg_stat_user_tables")
+                    return {"database_bytes": total, "table_count": count, "largest_tables": [dict(r) for r in rows]}
+
+            async def replication() -> Dict[str, Any]:
+                async with pool.acquire() as conn:
+                    if await conn.fetchval("SELECT pg_is_in_recovery()"):
+                        # The replay timestamp ages while the primary is idle, so a caught-up replica reports 0
+                        lag = await conn.fetchval(
+                            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+                        )
+                        return {"role": "replica", "lag_seconds": float(lag) if lag is not None else None}
+                    rows = await conn.fetch(
+                        "SELECT application_name, state, EXTRACT(EPOCH FROM replay_lag) AS lag FROM pg_stat_replication"
+                    )
+                    lags = [float(r["lag"]) for r in rows if r["lag"] is not None]
+                    return {"role": "primary", "replicas": len(rows), "lag_seconds": max(lags) if lags else 0.0}
+
+            tools = list(POSTGRES_MIGRATION_TABLES.items())
+            results = await asyncio.gather(
+                relations(), replication(), *(migrations(tool, table) for tool, table in tools)
+            )
+            return {
+                "sizes": results[0],
+                "replication": results[1],
+                "schema_versions": {tool: result for (tool, _), result in zip(tools, results[2:]) if result}
+            }
+        finally:
+            await pool.close()
+
+    async def _probe_mongodb(self, url: str) -> Dict[str, Any]:
+        """Sample collection sizes, migrate-mongo changelog and replica set lag from MongoDB"""
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(
+            url, maxPoolSize=self.pool_size,
+            serverSelectionTimeoutMS=int(self.timeout * 1000), connectTimeoutMS=int(self.timeout * 1000)
+        )
+        try:
+            db = client.get_default_database()
+
+            async def sizes() -> Dict[str, Any]:
+                stats = await db.command("dbStats")
+                # Views have no collStats and would fail the whole probe
+                names = await db.list_collection_names(filter={"type": "collection"})
+                coll_stats = await asyncio.gather(*(db.command("collStats", name) for name in names))
+                largest = sorted(
+                    ({"name": s["ns"], "bytes": s.get("size", 0) + s.get("totalIndexSize", 0), "documents": s.get("count", 0)}
+                     for s in coll_stats),
+                    key=lambda c: c["bytes"], reverse=True
+                )
+                return {"database_bytes": stats.get("dataSize", 0) + stats.get("indexSize", 0),
+                        "collection_count": len(names), "largest_collections": largest[:self.top_n]}
+
+            async def replication() -> Dict[str, Any]:
+                try:
+                    status = await client.admin.command("replSetGetStatus")
+                except Exception as e:
+                    code_name = (getattr(e, "details", None) or {}).get("codeName")
+                    if getattr(e, "code", None) in MONGODB_STANDALONE_ERRORS or code_name in MONGODB_STANDALONE_ERRORS.values():
+                        return {"role": "standalone", "lag_seconds": 0.0}
+                    # Auth or network failures say nothing about lag, so report it as unknown
+                    return {"role": "unknown", "lag_seconds": None, "error": f"{type(e).__name__}: {e}"}
+                members = status.get("members", [])
+                primary = next((m for m in members if m.get("stateStr") == "PRIMARY"), None)
+                if not primary:
+                    return {"role": "no_primary", "lag_seconds": None}
+                lags = [(primary["optimeDate"] - m["optimeDate"]).total_seconds()
+                        for m in members if m.get("stateStr") == "SECONDARY"]
+                return {"role": "replica_set", "replicas": len(lags), "lag_seconds": max(lags) if lags else 0.0}
+
+            async def migrations() -> Optional[Dict[str, Any]]:
+                changelog = db[MONGODB_CHANGELOG_COLLECTION]
+                applied = await changelog.count_documents({})
+                if not applied:
+                    return None
+                last = await changelog.find_one(sort=[("appliedAt", -1)])
+                return {"applied": applied, "failed": 0, "current_version": last.get("fileName")}
+
+            size_info, replication_info, migration_info = await asyncio.gather(sizes(), replication(), migrations())
+            return {
+                "sizes": size_info,
+                "replication": replication_info,
+                "schema_versions": {"migrate_mongo": migration_info} if migration_info else {}
+            }
+        finally:
+            client.close()
+
+    async def _probe_redis(self, url: str) -> Dict[str, Any]:
+        """Sample memory, keyspace and replication stats from Redis"""
+        import redis.asyncio as aioredis
+
+        pool = aioredis.ConnectionPool.from_url(
+            url, max_connections=self.pool_size, socket_timeout=self.timeout, socket_connect_timeout=self.timeout
+        )
+        client = aioredis.Redis(connection_pool=pool)
+        try:
+            memory, keyspace, replication = await asyncio.gather(
+                client.info("memory"), client.info("keyspace"), client.info("replication")
+            )
+            lags = [float(v.get("lag", 0)) for k, v in replication.items() if k.startswith("slave") and isinstance(v, dict)]
+            return {
+                "memory": {
+                    "used_bytes": memory.get("used_memory"),
+                    "peak_bytes": memory.get("used_memory_peak"),
+                    "max_bytes": memory.get("maxmemory"),
+                    "fragmentation_ratio": memory.get("mem_fragmentation_ratio"),
+                    "eviction_policy": memory.get("maxmemory_policy")
+                },
+                "keyspace": {db: {"keys": v.get("keys"), "expires": v.get("expires")} for db, v in keyspace.items()},
+                "replication": {"role": replication.get("role"), "replicas": len(lags),
+                                "lag_seconds": max(lags) if lags else 0.0}
+            }
+        finally:
+            await client.aclose()
+            await pool.disconnect()
+
+    async def _run_probe(self, name: str, probe) -> Dict[str, Any]:
+        """Run one probe under the timeout, turning every failure into a status"""
+        url = self._target_url(name)
+        if not url:
+            return {"status": "not_configured"}
+
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(probe(url), timeout=self.timeout)
+            result["status"] = "ok"
+        except ImportError as e:
+            result = {"status": "driver_missing", "error": str(e)}
+        except asyncio.TimeoutError:
+            result = {"status": "timeout"}
+        except Exception as e:
+            result = {"status": "unreachable", "error": f"{type(e).__name__}: {e}"}
+
+        result["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        if result["status"] != "ok":
+            self.logger.warning(f"Live probe for {name} returned {result['status']}")
+        return result
+
+    async def collect(self) -> Dict[str, Any]:
+        """Probe every database concurrently so a slow one cannot stall the others"""
+        probes = {
+            "postgresql": self._probe_postgresql,
+            "mongodb": self._probe_mongodb,
+            "redis": self._probe_redis
+        }
+        names = list(probes)
+        results = await asyncio.gather(*(self._run_probe(name, probes[name]) for name in names))
+        return {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "databases": dict(zip(names, results))
+        }
+
+
+def summarize_probe_health(live_metrics: Dict[str, Any], max_lag_seconds: float) -> Dict[str, List[str]]:
+    """Split probed databases into unreachable, lagging and failed-migration lists"""
+    summary = {"unreachable": [], "lagging": [], "failed_migrations": []}
+    for name, result in live_metrics.get("databases", {}).items():
+        if result.get("status") in ("not_configured", "driver_missing"):
+            continue
+        if result.get("status") != "ok":
+            summary["unreachable"].append(name)
+            continue
+        lag = result.get("replication", {}).get("lag_seconds")
+        if lag is None or lag > max_lag_seconds:
+            summary["lagging"].append(name)
+        for tool, versions in result.get("schema_versions", {}).items():
+            if versions.get("failed"):
+                summary["failed_migrations"].append(f"{name}:{tool}")
+    return summary
+
+
+def main():
+    """Run a standalone probe cycle with the default monitoring configuration"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    config_path = Path(__file__).parent / "config" / "monitoring-config.json"
+    with open(config_path, 'r') as f:
+        config = json.load(f).get("monitoring_config", {})
+
+    result = asyncio.run(DatabaseProbeCollector(config).collect())
+    json.dump(result, sys.stdout, indent=2, default=str)
+    print()
+
+
+if __name__ == "__main__":
+    main()
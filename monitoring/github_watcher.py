@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+DREAMSCAPE GitHub Repository Watcher
+Polls repositories, pull requests, commits and keyword searches concurrently
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sys
+import time
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+from urllib.parse import urlencode
+
+import aiohttp
+
+GITHUB_API_URL = "https://api.github.com"
+
+# GitHub search rejects queries with more than five AND/OR/NOT operators
+SEARCH_MAX_KEYWORDS = 6
+
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+LINK_NEXT_RE = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+class RateLimitExhausted(Exception):
+    """Raised when a rate-limit bucket will not reset within the allowed wait"""
+
+    def __init__(self, resource: str, reset_at: float):
+        super().__init__(f"GitHub '{resource}' rate limit exhausted until {datetime.fromtimestamp(reset_at).isoformat()}")
+        self.resource = resource
+        self.reset_at = reset_at
+
+
+class RateLimitBudget:
+    """Track GitHub rate-limit headers per resource and pace requests against them"""
+
+    def __init__(self, reserve: int = 0, max_wait: float = 60.0):
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.buckets: Dict[str, Dict[str, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def seed(self, resources: Dict[str, Any]):
+        """Seed buckets from a /rate_limit response"""
+        for resource, values in resources.items():
+            self.buckets[resource] = {
+                "limit": float(values.get("limit", 0)),
+                "remaining": float(values.get("remaining", 0)),
+                "reset": float(values.get("reset", 0))
+            }
+
+    def update(self, resource: str, headers: Any):
+        """Refresh a bucket from X-RateLimit-* response headers"""
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        resource = headers.get("X-RateLimit-Resource", resource)
+        self.buckets.setdefault(resource, {}).update({
+            "limit": float(headers.get("X-RateLimit-Limit", remaining)),
+            "remaining": float(remaining),
+            "reset": float(headers.get("X-RateLimit-Reset", time.time()))
+        })
+
+    def penalise(self, resource: str, retry_after: float):
+        """Hold a bucket back after a 403/429 response carrying Retry-After"""
+        bucket = self.buckets.setdefault(resource, {"limit": 0.0, "remaining": 0.0, "reset": 0.0})
+        # A secondary limit only blocks until Retry-After, not until the hourly window resets
+        bucket["retry_at"] = max(bucket.get("retry_at", 0.0), time.time() + retry_after)
+
+    def _reserve(self, resource: str) -> float:
+        """Reserve one request from a bucket, or return how long to wait for its reset"""
+        bucket = self.buckets.get(resource)
+        if bucket is None:
+            return 0.0
+        retry_wait = bucket.get("retry_at", 0.0) - time.time()
+        if retry_wait > 0:
+            if retry_wait > self.max_wait:
+                raise RateLimitExhausted(resource, bucket["retry_at"])
+            return retry_wait
+        if bucket["remaining"] <= self.reserve:
+            wait = bucket["reset"] - time.time()
+            if wait > self.max_wait:
+                raise RateLimitExhausted(resource, bucket["reset"])
+            if wait > 0:
+                return wait
+            bucket["remaining"] = bucket["limit"]
+        bucket["remaining"] -= 1
+        return 0.0
+
+    async def acquire(self, resource: str):
+        """Reserve one request from a bucket, waiting for its reset when needed
+
+        The wait is computed under the bucket's own lock but slept outside it, so
+        callers on other buckets, or already holding a reservation, are not blocked.
+        """
+        while True:
+            async with self._locks.setdefault(resource, asyncio.Lock()):
+                wait = self._reserve(resource)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current bucket state for reporting"""
+        return {
+            resource: {
+                "remaining": int(bucket["remaining"]),
+                "limit": int(bucket["limit"]),
+                "reset": datetime.fromtimestamp(bucket["reset"]).isoformat()
+            }
+            for resource, bucket in self.buckets.items()
+        }
+
+
+class GitHubWatcher:
+    """Incremental GitHub watcher driven by the monitoring configuration"""
+
+    def __init__(self, config: Dict[str, Any], state_path: Path, logger: Optional[logging.Logger] = None):
+        self.config = config
+        self.settings = config.get("github_watcher", {})
+        self.state_path = Path(state_path)
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.api_url = self.settings.get("api_url", GITHUB_API_URL).rstrip("/")
+        self.default_owner = self.settings.get("default_owner", "DREAMSCAPE-AI")
+        self.max_concurrency = int(self.settings.get("max_concurrency", 8))
+        self.per_page = int(self.settings.get("per_page", 50))
+        self.max_pages = int(self.settings.get("max_pages", 3))
+        self.timeout = float(self.settings.get("request_timeout_seconds", 20))
+        self.token = os.environ.get(self.settings.get("token_env", "GITHUB_TOKEN"))
+
+        self.budget = RateLimitBudget(
+            reserve=int(self.settings.get("rate_limit_reserve", 10)),
+            max_wait=float(self.settings.get("max_rate_limit_wait_seconds", 60))
+        )
+        self.state = self._load_state()
+        self.stats = {"requests": 0, "not_modified": 0, "errors": 0, "deferred": [], "incomplete": []}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _load_state(self) -> Dict[str, Any]:
+        """Load ETags and cursors persisted by the previous run"""
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        state.setdefault("etags", {})
+        state.setdefault("cursors", {})
+        state.setdefault("org_repositories", {})
+        state.setdefault("resume", {})
+        return state
+
+    def _save_state(self):
+        """Persist ETags and cursors atomically"""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        tmp_path.replace(self.state_path)
+
+    def _headers(self) -> Dict[str, str]:
+        """Default headers shared by every pooled request"""
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": "dreamscape-github-watcher"
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def _url(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Build a request URL with stable parameter ordering so ETag keys match"""
+        url = f"{self.api_url}{path}"
+        if params:
+            url += "?" + urlencode(sorted(params.items()))
+        return url
+
+    @staticmethod
+    def _resource_for(url: str) -> str:
+        """Map a request URL to its rate-limit bucket"""
+        return "search" if "/search/" in url else "core"
+
+    async def _get(self, session: aiohttp.ClientSession, url: str,
+                   conditional: bool = True) -> Tuple[int, Any, Optional[str]]:
+        """GET a URL through the pool, honouring ETags and the rate-limit budget"""
+        resource = self._resource_for(url)
+        headers = {}
+        etag = self.state["etags"].get(url) if conditional else None
+        if etag:
+            headers["If-None-Match"] = etag
+
+        for attempt in range(2):
+            # Wait for the budget before taking a pool slot so a rate-limit sleep never holds one
+            await self.budget.acquire(resource)
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                async with session.get(url, headers=headers) as resp:
+                    self.budget.update(resource, resp.headers)
+
+                    if resp.status == 304:
+                        self.stats["not_modified"] += 1
+                        return 304, None, None
+
+                    if resp.status in (403, 429) and attempt == 0 and (
+                            resp.headers.get("Retry-After") or resp.headers.get("X-RateLimit-Remaining") == "0"):
+                        retry_after = float(resp.headers.get("Retry-After", 0))
+                        if retry_after:
+                            self.budget.penalise(resource, retry_after)
+                        continue
+
+                    if resp.status >= 400:
+                        if resp.status != 404:
+                            self.stats["errors"] += 1
+                            self.logger.warning(f"GitHub API returned {resp.status} for {url}")
+                        return resp.status, None, None
+
+                    body = await resp.json(content_type=None)
+                    if conditional and resp.headers.get("ETag"):
+                        self.state["etags"][url] = resp.headers["ETag"]
+                    match = LINK_NEXT_RE.search(resp.headers.get("Link", ""))
+                    return resp.status, body, match.group(1) if match else None
+
+        self.stats["errors"] += 1
+        return 429, None, None
+
+    async def _get_new_items(self, session: aiohttp.ClientSession, url: str, is_new,
+                             unwrap: Optional[str] = None,
+                             conditional: bool = True) -> Tuple[Optional[List[Dict[str, Any]]], str, Optional[str]]:
+        """Fetch a newest-first listing and stop paging at the first already-seen item
+
+        Returns (items, outcome, pending_url). items is None when the first page is
+        unchanged (HTTP 304). outcome is "complete" when paging reached a seen item or
+        the end of the listing, "truncated" when max_pages was hit and "failed" when a
+        page could not be read; pending_url is the first page left unread. The first
+        page's ETag is only kept for a complete listing, so an interrupted one is read
+        again instead of answering 304 next run.
+        """
+        previous_etag = self.state["etags"].get(url)
+        items: List[Dict[str, Any]] = []
+        next_url: Optional[str] = url
+        page = 0
+        outcome = "complete"
+
+        try:
+            while next_url:
+                if page >= self.max_pages:
+                    outcome = "truncated"
+                    break
+                status, body, link_next = await self._get(session, next_url, conditional=conditional and page == 0)
+                if status == 304:
+                    return None, "complete", None
+                if body is None:
+                    outcome = "failed"
+                    break
+                page_items = body.get(unwrap, []) if unwrap else body
+                for item in page_items:
+                    if not is_new(item):
+                        return items, "complete", None
+                    items.append(item)
+                next_url = link_next
+                page += 1
+        except BaseException:
+            outcome = "failed"
+            raise
+        finally:
+            if conditional and outcome != "complete":
+                if previous_etag:
+                    self.state["etags"][url] = previous_etag
+                else:
+                    self.state["etags"].pop(url, None)
+
+        return items, outcome, next_url if outcome != "complete" else None
+
+    async def _fetch_since(self, session: aiohttp.ClientSession, cursor_key: str, url: str,
+                           newer_than, marker_of, unwrap: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return listing items newer than a cursor, resuming a listing the previous run left unfinished
+
+        The cursor only moves once the listing has been read down to it. When a page
+        fails or max_pages is hit, the newest marker read and the first unread page are
+        stored as a resume point: the next run reads items above that marker from the
+        top, then carries on from the resume page down to the old cursor.
+        """
+        cursor = self.state["cursors"].get(cursor_key)
+        resume = self.state["resume"].get(cursor_key)
+        top_marker = resume["marker"] if resume else cursor
+
+        items, outcome, pending = await self._get_new_items(session, url, newer_than(top_marker), unwrap)
+        items = items or []
+        marker = marker_of(items) if items else top_marker
+
+        if cursor is None and not resume and outcome == "truncated":
+            # First run: there is no backlog to catch up on beyond max_pages
+            outcome = "complete"
+        if outcome != "complete":
+            self.stats["incomplete"].append(cursor_key)
+            if items and cursor is not None and not resume:
+                self.state["resume"][cursor_key] = {"marker": marker, "next_url": pending}
+            return items
+
+        if resume:
+            older, outcome, pending = await self._get_new_items(
+                session, resume["next_url"], newer_than(cursor), unwrap, conditional=False
+            )
+            items.extend(older or [])
+            if outcome != "complete":
+                self.stats["incomplete"].append(cursor_key)
+                self.state["resume"][cursor_key] = {"marker": marker, "next_url": pending or resume["next_url"]}
+                return items
+            del self.state["resume"][cursor_key]
+
+        if marker is not None:
+            self.state["cursors"][cursor_key] = marker
+        return items
+
+    @staticmethod
+    def _updated_since(marker: Optional[str]):
+        """Predicate for items updated after a timestamp cursor"""
+        return lambda item: item.get("updated_at", "") > (marker or "")
+
+    @staticmethod
+    def _latest_update(items: List[Dict[str, Any]]) -> str:
+        """Timestamp cursor for a batch of items"""
+        return max(item["updated_at"] for item in items)
+
+    async def _watch_pull_requests(self, session: aiohttp.ClientSession, full_name: str) -> List[Dict[str, Any]]:
+        """Return pull requests updated since the last run"""
+        url = self._url(f"/repos/{full_name}/pulls", {
+            "state": "all", "sort": "updated", "direction": "desc", "per_page": self.per_page
+        })
+
+        items = await self._fetch_since(
+            session, f"pulls:{full_name}", url, self._updated_since, self._latest_update
+        )
+        return [{
+            "number": pr.get("number"),
+            "title": pr.get("title"),
+            "state": pr.get("state"),
+            "created_at": pr.get("created_at"),
+            "updated_at": pr.get("updated_at"),
+            "user": (pr.get("user") or {}).get("login"),
+            "head_branch": (pr.get("head") or {}).get("ref"),
+            "base_branch": (pr.get("base") or {}).get("ref"),
+            "url": pr.get("html_url")
+        } for pr in items]
+
+    async def _watch_commits(self, session: aiohttp.ClientSession, full_name: str) -> List[Dict[str, Any]]:
+        """Return commits pushed since the last seen commit"""
+        url = self._url(f"/repos/{full_name}/commits", {"per_page": self.per_page})
+
+        items = await self._fetch_since(
+            session, f"commits:{full_name}", url,
+            lambda last_sha: lambda commit: commit.get("sha") != last_sha,
+            lambda commits: commits[0]["sha"]
+        )
+        return [{
+            "sha": commit["sha"][:7],
+            "message": (commit.get("commit", {}).get("message") or "").split("\n")[0],
+            "author": commit.get("commit", {}).get("author", {}).get("name"),
+            "date": commit.get("commit", {}).get("author", {}).get("date"),
+            "url": commit.get("html_url")
+        } for commit in items]
+
+    async def _watch_keywords(self, session: aiohttp.ClientSession, full_name: str) -> List[Dict[str, Any]]:
+        """Return keyword-matching pull requests updated since the last run
+
+        Keywords are OR-ed into as few search queries as GitHub allows instead of
+        one query per keyword; matches are attributed to keywords locally. Each
+        query keeps its own cursor so one failing query cannot skip another's results.
+        """
+        keywords = [k.lower() for k in self.config.get("monitoring_keywords", [])]
+        if not keywords:
+            return []
+
+        chunks = [keywords[i:i + SEARCH_MAX_KEYWORDS] for i in range(0, len(keywords), SEARCH_MAX_KEYWORDS)]
+
+        found: Dict[int, Dict[str, Any]] = {}
+        for index, chunk in enumerate(chunks):
+            query = f"repo:{full_name} type:pr in:title,body " + " OR ".join(chunk)
+            url = self._url("/search/issues", {
+                "q": query, "sort": "updated", "order": "desc", "per_page": self.per_page
+            })
+            cursor_key = f"search:{full_name}" if index == 0 else f"search:{full_name}:{index}"
+            items = await self._fetch_since(
+                session, cursor_key, url, self._updated_since, self._latest_update, unwrap="items"
+            )
+            for issue in items:
+                found[issue["number"]] = issue
+
+        matches = []
+        for issue in sorted(found.values(), key=lambda i: i["updated_at"], reverse=True):
+            text = f"{issue.get('title') or ''} {issue.get('body') or ''}".lower()
+            matches.append({
+                "keywords": [k for k in keywords if re.search(rf"\b{re.escape(k)}\b", text)],
+                "number": issue.get("number"),
+                "title": issue.get("title"),
+                "state": issue.get("state"),
+                "updated_at": issue.get("updated_at"),
+                "user": (issue.get("user") or {}).get("login"),
+                "url": issue.get("html_url"),
+                "labels": [label.get("name") for label in issue.get("labels", [])]
+            })
+        return matches
+
+    async def _watch_repository(self, session: aiohttp.ClientSession, full_name: str) -> Dict[str, Any]:
+        """Check a repository and poll its PRs, commits and keyword searches concurrently"""
+        status, body, _ = await self._get(session, self._url(f"/repos/{full_name}"))
+        if status == 404:
+            return {"exists": False}
+        if status >= 400:
+            return {"exists": None, "error": status}
+
+        pull_requests, commits, keyword_matches = await asyncio.gather(
+            self._watch_pull_requests(session, full_name),
+            self._watch_commits(session, full_name),
+            self._watch_keywords(session, full_name)
+        )
+        result = {
+            "exists": True,
+            "changed": status != 304,
+            "new_pull_requests": pull_requests,
+            "new_commits": commits,
+            "keyword_matches": keyword_matches
+        }
+        if body:
+            result["pushed_at"] = body.get("pushed_at")
+            result["open_issues"] = body.get("open_issues_count")
+        return result
+
+    async def _list_org_repositories(self, session: aiohttp.ClientSession, org: str) -> List[str]:
+        """List an organization's repositories, reusing the cached list when unchanged"""
+        url = self._url(f"/orgs/{org}/repos", {"per_page": 100, "sort": "pushed"})
+        status, body, _ = await self._get(session, url)
+        if status == 304:
+            return self.state["org_repositories"].get(org, [])
+        if body is None:
+            self.logger.warning(f"Could not access organization: {org}")
+            return []
+        names = [repo["name"] for repo in body]
+        self.state["org_repositories"][org] = names
+        return names
+
+    async def _resolve_repositories(self, session: aiohttp.ClientSession) -> List[str]:
+        """Expand the configured organizations and targets into owner/repo names, by priority"""
+        organizations = sorted(
+            self.config.get("github_organizations", []),
+            key=lambda org: PRIORITY_ORDER.get(org.get("priority", "medium"), 1)
+        )
+        listed = await asyncio.gather(*(
+            self._list_org_repositories(session, org["name"])
+            for org in organizations if not org.get("repositories_of_interest")
+        ))
+        listed_by_org = iter(listed)
+
+        repositories: List[str] = [f"{self.default_owner}/{repo}" for repo in self.config.get("target_repositories", [])]
+        for org in organizations:
+            names = org.get("repositories_of_interest") or next(listed_by_org)
+            repositories.extend(f"{org['name']}/{name}" for name in names)
+
+        return list(dict.fromkeys(repositories))
+
+    async def _run_guarded(self, session: aiohttp.ClientSession, full_name: str) -> Dict[str, Any]:
+        """Watch one repository, deferring it if the rate-limit budget runs out"""
+        try:
+            return await self._watch_repository(session, full_name)
+        except RateLimitExhausted as e:
+            self.stats["deferred"].append(full_name)
+            return {"exists": None, "deferred": str(e)}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats["errors"] += 1
+            self.logger.warning(f"Error watching {full_name}: {e}")
+            return {"exists": None, "error": str(e)}
+
+    async def run(self) -> Dict[str, Any]:
+        """Run one incremental watch cycle and persist the new ETags and cursors"""
+        started = time.monotonic()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self._headers()) as session:
+            status, body, _ = await self._get(session, self._url("/rate_limit"), conditional=False)
+            if body:
+                self.budget.seed(body.get("resources", {}))
+
+            try:
+                repositories = await self._resolve_repositories(session)
+            except RateLimitExhausted as e:
+                self.logger.warning(f"Repository discovery deferred: {e}")
+                repositories = []
+            results = await asyncio.gather(*(self._run_guarded(session, name) for name in repositories))
+
+        self._save_state()
+        self.stats["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        self.logger.info(
+            f"GitHub watch completed: {len(repositories)} repositories, {self.stats['requests']} requests, "
+            f"{self.stats['not_modified']} not modified"
+        )
+        return {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "repositories": dict(zip(repositories, results)),
+            "stats": self.stats,
+            "rate_limit": self.budget.snapshot()
+        }
+
+
+def main():
+    """Run a standalone watch cycle with the default monitoring configuration"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    config_path = Path(__file__).parent / "config" / "monitoring-config.json"
+    with open(config_path, 'r') as f:
+        config = json.load(f).get("monitoring_config", {})
+
+    watcher = GitHubWatcher(config, Path(__file__).parent / "state" / "github-watcher.json")
+    result = asyncio.run(watcher.run())
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+DREAMSCAPE Kafka JMX Coverage Analyzer
+Cross-indexes JMX exporter rules with alert and dashboard queries and derives a minimal whitelist
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+import yaml
+
+from promql_cost_analyzer import CardinalitySnapshot, PromQLCostAnalyzer, YAML_LOADER
+
+DEFAULT_METRIC_PREFIXES = ("kafka_",)
+# Metrics served by kafka-exporter (consumer groups, topic offsets), not by the JMX exporter
+DEFAULT_EXTERNAL_PREFIXES = ("kafka_consumergroup_", "kafka_topic_", "kafka_brokers")
+
+# MBean names and request types are CamelCase words, so a captured group never adds an underscore
+NAME_SEGMENT = "[a-z0-9]+"
+CASED_NAME_SEGMENT = "[A-Za-z0-9]+"
+DIGITS_GROUPS = {r"\d+", r"\d*", "[0-9]+"}
+
+# Attributes the exporter appends to default-format names (rules without ``name``)
+JMX_ATTRIBUTES = (
+    "value", "count", "meanrate", "oneminuterate", "fiveminuterate", "fifteenminuterate",
+    "mean", "min", "max", "stddev", "50thpercentile", "75thpercentile", "95thpercentile",
+    "98thpercentile", "99thpercentile", "999thpercentile"
+)
+
+BEAN_PATTERN_RE = re.compile(r"^([\w.]+)<type=([\w-]+)[,>]")
+WHITELIST_ENTRY_RE = re.compile(r"^([\w.*]+):(.*)$")
+DOUBLE_QUOTED_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"')
+YAML_ESCAPES = set('0abtnvfre "/\\N_LPxuU\t')
+
+
+def capture_groups(pattern: str) -> List[Tuple[int, int, str]]:
+    """Return (start, end, body) of each capturing group in opening-parenthesis order"""
+    groups: List[Optional[Tuple[int, int, str]]] = []
+    stack: List[Tuple[int, Optional[int]]] = []
+    i, in_class = 0, False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            capturing = (not pattern.startswith("(?", i) or pattern.startswith("(?P<", i)
+                         or pattern.startswith("(?<", i) and pattern[i + 3:i + 4] not in ("=", "!"))
+            slot = None
+            if capturing:
+                slot = len(groups)
+                groups.append(None)
+            stack.append((i, slot))
+        elif char == ")" and stack:
+            start, slot = stack.pop()
+            if slot is not None:
+                groups[slot] = (start, i + 1, pattern[start + 1:i])
+        i += 1
+    return [g for g in groups if g is not None]
+
+
+def _repair_escapes(match: re.Match) -> str:
+    """Double backslashes that are not YAML escapes inside a double-quoted scalar (e.g. ``\\d``)"""
+    return re.sub(r"\\(.)", lambda m: m.group(0) if m.group(1) in YAML_ESCAPES else "\\\\" + m.group(1),
+                  match.group(0))
+
+
+def _unescape_literal(text: str) -> str:
+    """Drop regex escapes from a literal pattern fragment"""
+    return re.sub(r"\\(.)", r"\1", text)
+
+
+@dataclass
+class JMXRule:
+    """One jmx_exporter rule with the regexes needed to cross-index it"""
+    index: int
+    pattern: Optional[str]
+    name: Optional[str]
+    labels: Dict[str, str]
+    metric_type: Optional[str]
+    regex: Optional[re.Pattern] = None
+    groups: List[Tuple[int, int, str]] = field(default_factory=list)
+    name_regex: Optional[re.Pattern] = None
+
+    @property
+    def bean(self) -> Optional[Tuple[str, str]]:
+        """(domain, type) of the MBeans the pattern targets when both are literal"""
+        match = BEAN_PATTERN_RE.match(self.pattern or "")
+        return (match.group(1), match.group(2)) if match else None
+
+    @property
+    def is_catch_all(self) -> bool:
+        """Rules without ``name`` export every matching attribute in the default format"""
+        return self.name is None
+
+    def sample_bean(self) -> Optional[str]:
+        """A concrete bean string this rule matches, used to detect shadowing by earlier rules"""
+        if not self.pattern or self.regex is None:
+            return None
+        parts, last = [], 0
+        for start, end, body in self.groups:
+            if start < last:
+                continue
+            parts.append(_unescape_literal(self.pattern[last:start]))
+            if body in DIGITS_GROUPS:
+                parts.append("99")
+            elif re.fullmatch(r"[\w|]+", body):
+                parts.append(body.split("|")[0])
+            else:
+                parts.append("Sample")
+            last = end
+        parts.append(_unescape_literal(self.pattern[last:]))
+        sample = "".join(parts)
+        return sample if self.regex.fullmatch(sample) else None
+
+    def sample_name(self) -> Optional[str]:
+        """A metric name this rule would export, for duplicate detection"""
+        if self.name is None:
+            return None
+        return re.sub(r"\$(\d+)", lambda m: "99" if self._group_body(int(m.group(1))) in DIGITS_GROUPS else "sample",
+                      self.name.lower())
+
+    def _group_body(self, number: int) -> Optional[str]:
+        return self.groups[number - 1][2] if 0 < number <= len(self.groups) else None
+
+
+class KafkaCoverageAnalyzer:
+    """Checks that exported Kafka JMX metrics, alerts and dashboards agree"""
+
+    def __init__(self, monitoring_path: Path, jmx_config: str = "kafka-jmx-config.yml",
+                 snapshot: Optional[CardinalitySnapshot] = None,
+                 metric_prefixes: Tuple[str, ...] = DEFAULT_METRIC_PREFIXES,
+                 external_prefixes: Tuple[str, ...] = DEFAULT_EXTERNAL_PREFIXES,
+                 logger: Optional[logging.Logger] = None):
+        self.monitoring_path = Path(monitoring_path)
+        self.jmx_config_path = self.monitoring_path / jmx_config
+        self.snapshot = snapshot or CardinalitySnapshot()
+        self.metric_prefixes = tuple(metric_prefixes)
+        self.external_prefixes = tuple(external_prefixes)
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.lowercase_names = False
+        self.lowercase_labels = False
+        self.whitelist: List[str] = []
+        self.rules: List[JMXRule] = []
+        self.invalid_rules: List[Dict[str, Any]] = []
+        self.config_errors: List[str] = []
+        self.label_usage: Dict[str, set] = {}
+
+    def load_jmx_config(self):
+        """Parse whitelistObjectNames and rules from the exporter configuration"""
+        with open(self.jmx_config_path, 'r') as f:
+            text = f.read()
+        try:
+            config = yaml.load(text, Loader=YAML_LOADER) or {}
+        except yaml.YAMLError as e:
+            # The exporter's YAML parser rejects the file as well; keep analyzing with regex escapes repaired
+            self.config_errors.append(" ".join(str(e).split()))
+            config = yaml.load(DOUBLE_QUOTED_RE.sub(_repair_escapes, text), Loader=YAML_LOADER) or {}
+        self.lowercase_names = bool(config.get("lowercaseOutputName", False))
+        self.lowercase_labels = bool(config.get("lowercaseOutputLabelNames", False))
+        self.whitelist = list(config.get("whitelistObjectNames") or config.get("includeObjectNames") or [])
+
+        for index, raw in enumerate(config.get("rules") or []):
+            rule = JMXRule(index, raw.get("pattern"), raw.get("name"), raw.get("labels") or {}, raw.get("type"))
+            if rule.pattern is not None:
+                try:
+                    rule.regex = re.compile(rule.pattern)
+                except re.error as e:
+                    self.invalid_rules.append({"rule": index, "pattern": rule.pattern, "error": str(e)})
+                    continue
+                rule.groups = capture_groups(rule.pattern)
+            if rule.name is not None:
+                rule.name_regex = self._name_regex(rule)
+            self.rules.append(rule)
+
+    def _name_regex(self, rule: JMXRule) -> re.Pattern:
+        """Regex over exported metric names, with one named group per $n reference"""
+        template = rule.name.lower() if self.lowercase_names else rule.name
+        parts, seen, last = [], set(), 0
+        for match in re.finditer(r"\$(\d+)", template):
+            parts.append(re.escape(template[last:match.start()]))
+            number = int(match.group(1))
+            if number in seen:
+                parts.append(f"(?P=g{number})")
+            else:
+                body = rule._group_body(number) or ""
+                if body in DIGITS_GROUPS:
+                    segment = r"\d+"
+                elif re.fullmatch(r"[\w|]+", body):
+                    segment = body.lower() if self.lowercase_names else body
+                else:
+                    segment = NAME_SEGMENT if self.lowercase_names else CASED_NAME_SEGMENT
+                parts.append(f"(?P<g{number}>{segment})")
+                seen.add(number)
+            last = match.end()
+        parts.append(re.escape(template[last:]))
+        return re.compile("".join(parts))
+
+    def _whitelist_beans(self) -> List[Tuple[str, Optional[str], str]]:
+        """(domain, type, entry) for each whitelist entry; type is None when wildcarded"""
+        beans = []
+        for entry in self.whitelist:
+            match = WHITELIST_ENTRY_RE.match(entry)
+            if not match:
+                continue
+            properties = dict(p.split("=", 1) for p in match.group(2).split(",") if "=" in p)
+            bean_type = properties.get("type")
+            beans.append((match.group(1), None if bean_type in (None, "*") else bean_type, entry))
+        return beans
+
+    @staticmethod
+    def _default_name_regex(domain: str, bean_type: Optional[str]) -> re.Pattern:
+        """Names the exporter produces for a whitelisted bean without an explicit rule"""
+        prefix = re.sub(r"[^a-z0-9]", "_", domain.lower())
+        type_part = re.escape(bean_type.lower().replace("-", "_")) if bean_type else NAME_SEGMENT
+        return re.compile(f"{re.escape(prefix)}_{type_part}_(?:{'|'.join(JMX_ATTRIBUTES)})")
+
+    def load_queries(self) -> Dict[str, List[str]]:
+        """Map every metric referenced by rules and dashboards to the expressions using it
+
+        Also records in ``label_usage`` the labels each metric is filtered or
+        grouped on, attributing an expression's ``by`` labels to all its metrics.
+        """
+        queries = PromQLCostAnalyzer(self.monitoring_path, logger=self.logger)
+        queries.load_scrape_configs()
+        queries.load_rules()
+        queries.load_dashboards()
+        usage: Dict[str, List[str]] = {}
+        for item in queries.items:
+            for metric in item.parsed.metrics:
+                usage.setdefault(metric, []).append(item.id)
+            grouping = {label for a in item.parsed.aggregations if not a.without for label in a.labels}
+            for selector in item.parsed.selectors:
+                if selector.metric:
+                    labels = self.label_usage.setdefault(selector.metric, set())
+                    labels.update(m.label for m in selector.matchers if m.label != "__name__")
+                    labels.update(grouping)
+        return usage
+
+    def _in_scope(self, metric: str) -> bool:
+        return metric.startswith(self.metric_prefixes) and ":" not in metric
+
+    def analyze(self) -> Dict[str, Any]:
+        """Cross-index exporter rules with query usage and derive the minimal configuration"""
+        self.load_jmx_config()
+        usage = self.load_queries()
+        named_rules = [r for r in self.rules if r.name_regex is not None]
+        whitelist_beans = self._whitelist_beans()
+
+        covered: Dict[str, List[int]] = {}
+        catch_all_only: Dict[str, str] = {}
+        missing = []
+        external = sorted(m for m in usage if self._in_scope(m) and m.startswith(self.external_prefixes))
+        # captured values per (rule, group number), used to narrow the minimal rule patterns
+        captured: Dict[Tuple[int, int], set] = {}
+
+        for metric in sorted(m for m in usage if self._in_scope(m) and not m.startswith(self.external_prefixes)):
+            matches = []
+            for rule in named_rules:
+                match = rule.name_regex.fullmatch(metric)
+                if match:
+                    matches.append(rule.index)
+                    for group, value in match.groupdict().items():
+                        captured.setdefault((rule.index, int(group[1:])), set()).add(value)
+            if matches:
+                covered[metric] = matches
+                continue
+            entry = next((e for d, t, e in whitelist_beans if self._default_name_regex(d, t).fullmatch(metric)), None)
+            if entry and any(r.is_catch_all for r in self.rules):
+                catch_all_only[metric] = entry
+                continue
+            prefixes = sorted(
+                ((len(re.split(r"\$\d", (r.name or "").lower())[0]), r.index) for r in named_rules
+                 if metric.startswith(re.split(r"\$\d", (r.name or "").lower())[0])),
+                reverse=True
+            )
+            missing.append({
+                "metric": metric,
+                "used_by": usage[metric],
+                "closest_rules": sorted(index for length, index in prefixes if length == prefixes[0][0])
+            })
+
+        used_rules = sorted({index for indexes in covered.values() for index in indexes})
+        used_entries = {entry for entry in catch_all_only.values()}
+        for index in used_rules:
+            bean = self.rules[index].bean
+            for domain, bean_type, entry in whitelist_beans:
+                if bean is None or (domain == bean[0] and bean_type in (None, bean[1])):
+                    used_entries.add(entry)
+
+        shadowed = []
+        for rule in self.rules:
+            sample = rule.sample_bean()
+            if sample is None or rule.is_catch_all:
+                continue
+            shadow = next((r for r in self.rules[:rule.index] if r.regex is not None and r.regex.fullmatch(sample)), None)
+            if shadow is None:
+                continue
+            entry = {"rule": rule.index, "shadowed_by": shadow.index, "sample_bean": sample}
+            if rule.index in used_rules and shadow.index in used_rules:
+                # Enabling the shadowed rule adds its extra labels to series the shadower exports today
+                queried = set().union(*(self.label_usage.get(m, set()) for m, idx in covered.items() if rule.index in idx))
+                extra = {k.lower() if self.lowercase_labels else k for k in set(rule.labels) - set(shadow.labels)}
+                entry["labels_needed"] = sorted(extra & queried)
+                entry["minimal_config"] = "moved_ahead" if entry["labels_needed"] else "dropped"
+            shadowed.append(entry)
+
+        duplicates = []
+        for i, first in enumerate(named_rules):
+            for second in named_rules[i + 1:]:
+                sample = second.sample_name()
+                if sample and first.name_regex.fullmatch(sample):
+                    duplicates.append({
+                        "rules": [first.index, second.index],
+                        "name": first.name,
+                        "label_difference": sorted(set(first.labels) ^ set(second.labels))
+                    })
+
+        whitelisted = {(d, t) for d, t, _ in whitelist_beans}
+        rules_outside_whitelist = [
+            r.index for r in self.rules
+            if r.bean and (r.bean[0], r.bean[1]) not in whitelisted and (r.bean[0], None) not in whitelisted
+        ]
+        rule_beans = {r.bean for r in self.rules if r.bean}
+        whitelist_without_rules = [
+            entry for domain, bean_type, entry in whitelist_beans
+            if not any(b[0] == domain and bean_type in (None, b[1]) for b in rule_beans)
+        ]
+
+        unused_series = {}
+        for metric, series in self.snapshot.series.items():
+            if self._in_scope(metric) and not metric.startswith(self.external_prefixes) and metric not in usage:
+                unused_series[metric] = series
+
+        return {
+            "jmx_config": str(self.jmx_config_path.relative_to(self.monitoring_path)),
+            "config_errors": self.config_errors,
+            "rules": len(self.rules),
+            "whitelist_entries": len(self.whitelist),
+            "referenced_metrics": len(covered) + len(catch_all_only) + len(missing),
+            "external_metrics": external,
+            "coverage": {
+                "covered": covered,
+                "catch_all_only": catch_all_only,
+                "missing": missing
+            },
+            "dead_rules": [{"rule": r.index, "pattern": r.pattern, "name": r.name}
+                           for r in named_rules if r.index not in used_rules],
+            "catch_all_rules": [r.index for r in self.rules if r.is_catch_all],
+            "shadowed_rules": shadowed,
+            "duplicate_exports": duplicates,
+            "invalid_rules": self.invalid_rules,
+            "rules_outside_whitelist": rules_outside_whitelist,
+            "whitelist_without_rules": whitelist_without_rules,
+            "unused_whitelist_entries": [entry for _, _, entry in whitelist_beans if entry not in used_entries],
+            "unused_exported_series": {
+                "snapshot": self.snapshot.source,
+                "series": sum(unused_series.values()),
+                "metrics": dict(sorted(unused_series.items(), key=lambda kv: kv[1], reverse=True))
+            },
+            "minimal_config": self.minimal_config(used_rules, used_entries, captured, shadowed)
+        }
+
+    def minimal_config(self, used_rules: List[int], used_entries: set, captured: Dict[Tuple[int, int], set],
+                       shadowed: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Exporter settings keeping only the beans and rules that feed a query
+
+        Wildcard groups that feed the metric name are narrowed to the values
+        actually queried, case-insensitively since output names are lowercased.
+        The catch-all rule is dropped. A rule shadowed by a broader used rule
+        never fires today, so it is dropped too, unless a query needs a label
+        only it provides; then it is moved ahead of the broader rule, which
+        raises cardinality and is reported as ``labels_needed``.
+        """
+        dropped = {s["rule"] for s in shadowed if s.get("minimal_config") == "dropped"}
+        shadowed_by = {s["rule"]: s["shadowed_by"] for s in shadowed if s.get("minimal_config") == "moved_ahead"}
+        order = sorted((i for i in used_rules if i not in dropped),
+                       key=lambda i: (shadowed_by.get(i, i) - (0.5 if i in shadowed_by else 0), i))
+        rules = []
+        for index in order:
+            rule = self.rules[index]
+            pattern = rule.pattern
+            if pattern is not None:
+                for number in range(len(rule.groups), 0, -1):
+                    start, end, body = rule.groups[number - 1]
+                    values = captured.get((index, number))
+                    nested = any(start < s and e <= end for s, e, _ in rule.groups)
+                    # literal alternations are already narrow; nested groups would shift offsets
+                    if not values or nested or re.fullmatch(r"[\w|]+", body):
+                        continue
+                    alternatives = "|".join(sorted(values))
+                    narrowed = alternatives if body in DIGITS_GROUPS else f"(?i:{alternatives})"
+                    pattern = f"{pattern[:start]}({narrowed}){pattern[end:]}"
+            minimal = {"pattern": pattern, "name": rule.name}
+            if rule.metric_type:
+                minimal["type"] = rule.metric_type
+            if rule.labels:
+                minimal["labels"] = rule.labels
+            rules.append(minimal)
+        return {
+            "lowercaseOutputName": self.lowercase_names,
+            "lowercaseOutputLabelNames": self.lowercase_labels,
+            "whitelistObjectNames": [entry for entry in self.whitelist if entry in used_entries],
+            "rules": rules
+        }
+
+
+def main():
+    """Print the coverage report, optionally writing the minimal exporter config"""
+    parser = argparse.ArgumentParser(description="Cross-check Kafka JMX exports against alerts and dashboards")
+    parser.add_argument("--jmx-config", default="kafka-jmx-config.yml", help="Exporter config relative to monitoring/")
+    parser.add_argument("--snapshot", help="Series cardinality snapshot (output of /api/v1/status/tsdb)")
+    parser.add_argument("--write-minimal", help="Write the minimal exporter config (YAML) to this path")
+    args = parser.parse_args()
+
+    analyzer = KafkaCoverageAnalyzer(
+        Path(__file__).parent, args.jmx_config,
+        CardinalitySnapshot.load(Path(args.snapshot) if args.snapshot else None)
+    )
+    report = analyzer.analyze()
+    if args.write_minimal:
+        with open(args.write_minimal, 'w') as f:
+            yaml.safe_dump(report["minimal_config"], f, sort_keys=False)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
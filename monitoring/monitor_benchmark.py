@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+DREAMSCAPE Migration Monitor Benchmark
+Times every analyzer and a full monitoring cycle on synthetic large repositories
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any
+
+MIB = 1024 ** 2
+
+MONITOR_PATH = Path(__file__).parent / "database-migration-monitor.py"
+DEFAULT_CONFIG_PATH = Path(__file__).parent / "config" / "monitoring-config.json"
+DEFAULT_BASELINE_PATH = Path(__file__).parent / "config" / "benchmark-baseline.json"
+KAFKA_JMX_CONFIG_PATH = Path(__file__).parent / "kafka-jmx-config.yml"
+
+# Synthetic repository sizes; "large" is the scale the monitoring cron must survive
+PROFILES = {
+    "small": {
+        "services": 50, "hpa_every": 2, "terraform_modules": 10, "terraform_resources": 20,
+        "rule_files": 10, "rules_per_file": 20, "dashboards": 10, "panels_per_dashboard": 10
+    },
+    "medium": {
+        "services": 500, "hpa_every": 2, "terraform_modules": 50, "terraform_resources": 50,
+        "rule_files": 40, "rules_per_file": 25, "dashboards": 40, "panels_per_dashboard": 20
+    },
+    "large": {
+        "services": 2000, "hpa_every": 2, "terraform_modules": 200, "terraform_resources": 100,
+        "rule_files": 100, "rules_per_file": 30, "dashboards": 100, "panels_per_dashboard": 30
+    }
+}
+OVERLAYS = {"dev": 1, "staging": 2, "prod": 3}
+
+# A metric regresses when current > baseline * (1 + relative) + absolute
+DEFAULT_TOLERANCES = {
+    "wall_seconds": {"relative": 0.5, "absolute": 0.05},
+    "peak_memory_mib": {"relative": 0.25, "absolute": 1.0},
+    "files_read": {"relative": 0.0, "absolute": 0}
+}
+
+DEPLOYMENT_TEMPLATE = """apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: {name}
+  labels:
+    app: {name}
+    part-of: dreamscape
+spec:
+  replicas: {replicas}
+  selector:
+    matchLabels:
+      app: {name}
+  template:
+    metadata:
+      labels:
+        app: {name}
+    spec:
+      containers:
+      - name: {name}
+        image: ghcr.io/dreamscape/{name}:latest
+        env:
+        - name: DATABASE_URL
+          valueFrom:
+            secretKeyRef:
+              name: {name}-secrets
+              key: database-url
+        - name: REDIS_URL
+          valueFrom:
+            secretKeyRef:
+              name: {name}-secrets
+              key: redis-url
+        resources:
+          requests:
+            memory: "{memory_request}Mi"
+            cpu: "{cpu_request}m"
+          limits:
+            memory: "{memory_limit}Mi"
+            cpu: "{cpu_limit}m"
+        livenessProbe:
+          httpGet:
+            path: /health
+            port: 3000
+        readinessProbe:
+          httpGet:
+            path: /ready
+            port: 3000
+        securityContext:
+          allowPrivilegeEscalation: false
+          runAsNonRoot: true
+"""
+
+SERVICE_TEMPLATE = """apiVersion: v1
+kind: Service
+metadata:
+  name: {name}
+spec:
+  selector:
+    app: {name}
+  ports:
+  - port: 80
+    targetPort: 3000
+"""
+
+HPA_TEMPLATE = """apiVersion: autoscaling/v2
+kind: HorizontalPodAutoscaler
+metadata:
+  name: {name}
+spec:
+  scaleTargetRef:
+    apiVersion: apps/v1
+    kind: Deployment
+    name: {name}
+  minReplicas: {min_replicas}
+  maxReplicas: {max_replicas}
+  metrics:
+  - type: Resource
+    resource:
+      name: cpu
+      target:
+        type: Utilization
+        averageUtilization: 70
+"""
+
+K3S_VARIABLES = """variable "server_count" {
+  default = 3
+}
+
+variable "agent_count" {
+  default = 20
+}
+
+variable "server_ocpus" {
+  default = 4
+}
+
+variable "server_memory" {
+  default = 24
+}
+
+variable "agent_ocpus" {
+  default = 4
+}
+
+variable "agent_memory" {
+  default = 24
+}
+
+variable "shape" {
+  default = "VM.Standard.A1.Flex"
+}
+"""
+
+K3S_MAIN = """resource "oci_core_instance" "k3s_server" {
+  count = var.server_count
+  shape = var.shape
+
+  shape_config {
+    ocpus         = var.server_ocpus
+    memory_in_gbs = var.server_memory
+  }
+}
+
+resource "oci_core_instance" "k3s_agent" {
+  count = var.agent_count
+  shape = var.shape
+
+  shape_config {
+    ocpus         = var.agent_ocpus
+    memory_in_gbs = var.agent_memory
+  }
+}
+"""
+
+DATABASE_RESOURCE_TEMPLATES = (
+    """resource "oci_database_autonomous_database" "postgres_{i}" {{
+  cpu_core_count           = var.postgres_cpu_count
+  data_storage_size_in_tbs = 1
+  db_workload              = "OLTP"
+  is_auto_scaling_enabled  = true
+}}
+""",
+    """resource "oci_redis_redis_cluster" "cache_{i}" {{
+  node_count      = 3
+  software_version = "REDIS_7_0"
+}}
+""",
+    """resource "oci_core_instance" "mongodb_{i}" {{
+  count = var.enable_mongodb ? 1 : 0
+  metadata = {{
+    mongodb_replica_set = "rs{i}"
+    mongodb_version     = var.mongodb_version
+  }}
+}}
+""",
+    """resource "oci_objectstorage_bucket" "database_backups_{i}" {{
+  name = "database-backups-{i}"
+  retention_rules {{
+    duration {{
+      time_amount = var.backup_retention_days
+    }}
+  }}
+}}
+"""
+)
+
+
+class SyntheticRepository:
+    """Writes a deterministic infra repository of the requested size"""
+
+    def __init__(self, root: Path, params: Dict[str, int], seed: int = 42):
+        self.root = Path(root)
+        self.params = params
+        self.random = random.Random(seed)
+
+    def _write(self, relative: str, content: str):
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def _service_names(self) -> List[str]:
+        return ["auth"] + [f"svc-{i:04d}" for i in range(1, self.params["services"])]
+
+    def generate_kubernetes(self):
+        """Base service directories plus dev/staging/prod overlays with replicas and patches"""
+        names = self._service_names()
+        for index, name in enumerate(names):
+            cpu_request = self.random.choice((50, 100, 250, 500))
+            memory_request = self.random.choice((64, 128, 256, 512))
+            resources = ["deployment.yaml", "service.yaml"]
+            self._write(f"k8s/base/{name}/deployment.yaml", DEPLOYMENT_TEMPLATE.format(
+                name=name, replicas=2, cpu_request=cpu_request, memory_request=memory_request,
+                cpu_limit=cpu_request * self.random.choice((1, 2, 4)),
+                memory_limit=memory_request * self.random.choice((1, 2))
+            ))
+            self._write(f"k8s/base/{name}/service.yaml", SERVICE_TEMPLATE.format(name=name))
+            if index % self.params["hpa_every"] == 0:
+                resources.append("hpa.yaml")
+                self._write(f"k8s/base/{name}/hpa.yaml", HPA_TEMPLATE.format(
+                    name=name, min_replicas=2, max_replicas=self.random.choice((5, 10, 15))
+                ))
+            self._write(f"k8s/base/{name}/kustomization.yaml",
+                        "resources:\n" + "".join(f"- {r}\n" for r in resources))
+
+        for overlay, count in OVERLAYS.items():
+            lines = [f"namespace: dreamscape-{overlay}", "resources:"]
+            lines += [f"- ../../base/{name}" for name in names]
+            lines.append("replicas:")
+            lines += [f"- name: {name}\n  count: {count}" for name in names]
+            lines += [
+                "patches:",
+                "- target:\n    kind: HorizontalPodAutoscaler",
+                f"  patch: |-\n    - op: replace\n      path: /spec/maxReplicas\n      value: {count * 5}"
+            ]
+            self._write(f"k8s/overlays/{overlay}/kustomization.yaml", "\n".join(lines) + "\n")
+
+    def generate_terraform(self):
+        """A large databases module, the k3s module and many unrelated modules"""
+        blocks = [DATABASE_RESOURCE_TEMPLATES[i % len(DATABASE_RESOURCE_TEMPLATES)].format(i=i)
+                  for i in range(self.params["terraform_resources"])]
+        self._write("terraform/modules/databases/main.tf", "\n".join(blocks))
+        self._write("terraform/modules/k3s/variables.tf", K3S_VARIABLES)
+        self._write("terraform/modules/k3s/main.tf", K3S_MAIN)
+        for module in range(self.params["terraform_modules"]):
+            body = "\n".join(
+                f'resource "oci_core_subnet" "subnet_{module}_{i}" {{\n  cidr_block = "10.{module % 250}.{i % 250}.0/24"\n}}\n'
+                for i in range(self.params["terraform_resources"])
+            )
+            self._write(f"terraform/modules/module-{module:03d}/main.tf", body)
+            self._write(f"terraform/modules/module-{module:03d}/variables.tf",
+                        f'variable "name_{module}" {{\n  default = "module-{module}"\n}}\n')
+
+    def generate_monitoring(self):
+        """Scrape config, rule files, dashboards and config"""
+        jobs = [f"job-{i}" for i in range(20)]
+        self._write("monitoring/prometheus.yml", json.dumps({
+            "global": {"scrape_interval": "15s", "evaluation_interval": "15s"},
+            "scrape_configs": [{"job_name": job, "scrape_interval": self.random.choice(("15s", "30s", "60s"))}
+                               for job in jobs]
+        }, indent=2))
+
+        series = {}
+        for f in range(self.params["rule_files"]):
+            rules = []
+            for r in range(self.params["rules_per_file"]):
+                metric = f"app_requests_total_{f}_{r}"
+                series[metric] = self.random.randint(10, 5000)
+                job = self.random.choice(jobs)
+                rules.append({"record": f"job:{metric}:rate5m",
+                              "expr": f'sum by (job, service) (rate({metric}{{job="{job}"}}[5m]))'})
+                rules.append({"alert": f"High{f}x{r}",
+                              "expr": f"job:{metric}:rate5m > {self.random.randint(1, 100)}", "for": "5m"})
+            self._write(f"monitoring/rules/rules-{f:03d}.yaml",
+                        json.dumps({"groups": [{"name": f"group-{f}", "interval": "30s", "rules": rules}]}, indent=2))
+
+        metrics = list(series)
+        for d in range(self.params["dashboards"]):
+            panels = [{
+                "id": p, "title": f"Panel {p}", "type": "timeseries",
+                "targets": [{"refId": "A", "expr": f"sum(rate({self.random.choice(metrics)}[$__rate_interval]))"}]
+            } for p in range(self.params["panels_per_dashboard"])]
+            self._write(f"monitoring/grafana/dashboards/dashboard-{d:03d}.json", json.dumps({
+                "dashboard": {"title": f"Dashboard {d}", "refresh": "30s", "time": {"from": "now-6h"}, "panels": panels}
+            }))
+        self._write("monitoring/config/series-cardinality.json", json.dumps({"series": series}))
+        self._write("monitoring/kafka-jmx-config.yml", KAFKA_JMX_CONFIG_PATH.read_text())
+
+        with open(DEFAULT_CONFIG_PATH, 'r') as f:
+            config = json.load(f)
+        monitoring_config = config.setdefault("monitoring_config", {})
+        # Network-backed analyzers stay disabled: the benchmark measures the repository scan only
+        monitoring_config.setdefault("github_watcher", {})["enabled"] = False
+        monitoring_config.setdefault("live_probes", {})["enabled"] = False
+        monitoring_config.setdefault("promql_cost", {})["cardinality_snapshot"] = "config/series-cardinality.json"
+        self._write("monitoring/config/monitoring-config.json", json.dumps(config, indent=2))
+
+        self._write("monitoring/state/github-watcher.json", json.dumps({"repositories": {}}))
+
+    def generate(self) -> Path:
+        """Write the whole repository and return its root"""
+        self.generate_kubernetes()
+        self.generate_terraform()
+        self.generate_monitoring()
+        return self.root
+
+
+_ACTIVE_COUNTERS: List["FileReadCounter"] = []
+_AUDIT_HOOK_INSTALLED = False
+
+
+def _audit_open(event: str, args: tuple):
+    """Audit hook forwarding read-only opens to the active counters"""
+    if event != "open" or not _ACTIVE_COUNTERS:
+        return
+    path, mode, flags = args
+    if isinstance(path, int) or path is None:
+        return
+    if isinstance(mode, str):
+        if any(c in mode for c in "wax+"):
+            return
+    elif flags & (os.O_WRONLY | os.O_RDWR):
+        return
+    path = os.path.abspath(os.fsdecode(path))
+    for counter in _ACTIVE_COUNTERS:
+        if path.startswith(counter.root):
+            counter.opens += 1
+            counter.paths.add(path)
+
+
+class FileReadCounter:
+    """Counts files opened for reading below a root while active
+
+    Audit hooks cannot be removed, so a single hook is installed on first use
+    and only does work while a counter is active.
+    """
+
+    def __init__(self, root: Path):
+        self.root = os.path.abspath(root) + os.sep
+        self.opens = 0
+        self.paths = set()
+
+    def __enter__(self) -> "FileReadCounter":
+        global _AUDIT_HOOK_INSTALLED
+        if not _AUDIT_HOOK_INSTALLED:
+            sys.addaudithook(_audit_open)
+            _AUDIT_HOOK_INSTALLED = True
+        _ACTIVE_COUNTERS.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _ACTIVE_COUNTERS.remove(self)
+
+
+def measure(func: Callable[[], Any], root: Path, repeats: int) -> Dict[str, Any]:
+    """Median wall time over untraced repeats, then one traced run for peak memory and files read
+
+    tracemalloc slows allocation-heavy code several times over, so it is never
+    active while wall time is measured.
+    """
+    timings = []
+    for _ in range(max(1, repeats)):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    with FileReadCounter(root) as counter:
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "wall_seconds": round(statistics.median(timings), 4),
+        "peak_memory_mib": round(peak / MIB, 2),
+        "files_read": counter.opens,
+        "distinct_files_read": len(counter.paths)
+    }
+
+
+def load_monitor_module():
+    """Import database-migration-monitor.py, whose file name is not a valid module name"""
+    if "database_migration_monitor" in sys.modules:
+        return sys.modules["database_migration_monitor"]
+    sys.path.insert(0, str(MONITOR_PATH.parent))
+    spec = importlib.util.spec_from_file_location("database_migration_monitor", MONITOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["database_migration_monitor"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def benchmark_profile(name: str, params: Dict[str, int], workdir: Path, repeats: int,
+                      max_workers: int, logger: logging.Logger) -> Dict[str, Any]:
+    """Generate one synthetic repository and measure every analyzer plus a full cycle on it"""
+    monitor_module = load_monitor_module()
+    registry = monitor_module.ANALYZERS
+
+    started = time.perf_counter()
+    root = SyntheticRepository(workdir / name, params).generate()
+    logger.info(f"Generated {name} repository in {time.perf_counter() - started:.1f}s: {root}")
+
+    monitor = monitor_module.DatabaseMigrationMonitor(
+        config_path=root / "monitoring" / "config" / "monitoring-config.json",
+        max_workers=max_workers, base_path=root
+    )
+
+    # Warm-up run: imports every analyzer module and provides dependency results
+    warmup = registry.run(monitor, max_workers=max_workers, logger=logger)
+    errors = {n: r["error"] for n, r in warmup.results.items() if isinstance(r, dict) and "error" in r}
+
+    results = {}
+    for analyzer_name in registry.select()[0]:
+        analyzer = registry.get(analyzer_name)
+        dependencies = {dep: warmup.results[dep] for dep in analyzer.depends_on}
+        results[f"analyzer:{analyzer_name}"] = measure(
+            lambda: analyzer.func(monitor, **dependencies), root, repeats
+        )
+        logger.info(f"{name} analyzer:{analyzer_name}: {results[f'analyzer:{analyzer_name}']}")
+
+    results["run_monitoring_cycle"] = measure(monitor.run_monitoring_cycle, root, repeats)
+    logger.info(f"{name} run_monitoring_cycle: {results['run_monitoring_cycle']}")
+    return {"params": params, "errors": errors, "results": results}
+
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any],
+                        tolerances: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, List[Any]]:
+    """List metrics that exceed their baseline plus tolerance"""
+    tolerances = tolerances or baseline.get("tolerances") or DEFAULT_TOLERANCES
+    comparison = {"regressions": [], "improvements": [], "not_compared": []}
+    for profile, measured in current.get("profiles", {}).items():
+        reference = baseline.get("profiles", {}).get(profile)
+        if not reference:
+            comparison["not_compared"].append(f"{profile}: no baseline")
+            continue
+        if reference.get("params") != measured.get("params"):
+            comparison["not_compared"].append(f"{profile}: synthetic repository parameters changed")
+            continue
+        for target, metrics in measured["results"].items():
+            reference_metrics = reference.get("results", {}).get(target)
+            if not reference_metrics:
+                comparison["not_compared"].append(f"{profile} {target}: no baseline")
+                continue
+            for metric, tolerance in tolerances.items():
+                base, value = reference_metrics.get(metric), metrics.get(metric)
+                if base is None or value is None:
+                    continue
+                entry = {"profile": profile, "target": target, "metric": metric, "baseline": base, "current": value}
+                if value > base * (1 + tolerance["relative"]) + tolerance["absolute"]:
+                    comparison["regressions"].append(entry)
+                elif value < base * (1 - tolerance["relative"]) - tolerance["absolute"]:
+                    comparison["improvements"].append(entry)
+    return comparison
+
+
+def print_summary(current: Dict[str, Any], comparison: Optional[Dict[str, List[Any]]]):
+    """Print a per-target table and any regressions"""
+    print(f"{'profile':<8} {'target':<34} {'wall (s)':>9} {'peak (MiB)':>11} {'files':>7}")
+    for profile, measured in current["profiles"].items():
+        for target, metrics in measured["results"].items():
+            print(f"{profile:<8} {target:<34} {metrics['wall_seconds']:>9.4f} "
+                  f"{metrics['peak_memory_mib']:>11.2f} {metrics['files_read']:>7}")
+        for analyzer_name, error in measured["errors"].items():
+            print(f"{profile:<8} analyzer:{analyzer_name} failed: {error}")
+    if comparison is None:
+        return
+    for entry in comparison["regressions"]:
+        print(f"REGRESSION {entry['profile']} {entry['target']} {entry['metric']}: "
+              f"{entry['baseline']} -> {entry['current']}")
+    for note in comparison["not_compared"]:
+        print(f"not compared: {note}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark the migration monitor on synthetic repositories")
+    parser.add_argument("--profile", action="append", metavar="PROFILE",
+                        help=f"Profiles to run (repeatable or comma-separated): {', '.join(PROFILES)}")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per target (median is kept)")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum analyzers run concurrently")
+    parser.add_argument("--workdir", help="Keep generated repositories here instead of a temporary directory")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    parser.add_argument("--metrics", metavar="METRICS",
+                        help=f"Comma-separated metrics to gate on (default: all): {', '.join(DEFAULT_TOLERANCES)}")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Run the selected profiles, compare them to the baseline and exit 1 on regression"""
+    args = parse_args()
+    # Configure logging before the monitor does, so its file handler and INFO output stay off
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(message)s')
+    logger = logging.getLogger("monitor_benchmark")
+    logger.setLevel(logging.INFO)
+
+    profiles = [p.strip() for value in args.profile or ["small,medium"] for p in value.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in PROFILES]
+    if unknown:
+        print(f"Unknown profile(s): {', '.join(unknown)}. Available: {', '.join(PROFILES)}", file=sys.stderr)
+        sys.exit(2)
+    metrics = [m.strip() for m in (args.metrics or "").split(",") if m.strip()]
+    unknown = [m for m in metrics if m not in DEFAULT_TOLERANCES]
+    if unknown:
+        print(f"Unknown metric(s): {', '.join(unknown)}. Available: {', '.join(DEFAULT_TOLERANCES)}", file=sys.stderr)
+        sys.exit(2)
+
+    with tempfile.TemporaryDirectory(prefix="monitor-benchmark-") as tmp:
+        workdir = Path(args.workdir) if args.workdir else Path(tmp)
+        current = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": sys.version.split()[0],
+            "repeats": args.repeats,
+            "tolerances": DEFAULT_TOLERANCES,
+            "profiles": {
+                profile: benchmark_profile(profile, PROFILES[profile], workdir, args.repeats, args.workers, logger)
+                for profile in profiles
+            }
+        }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    baseline_path = Path(args.baseline)
+    failed = any(measured["errors"] for measured in current["profiles"].values())
+    if args.update_baseline:
+        baseline = {}
+        if baseline_path.exists():
+            with open(baseline_path, 'r') as f:
+                baseline = json.load(f)
+        baseline.update({k: v for k, v in current.items() if k != "profiles"})
+        baseline.setdefault("profiles", {}).update(current["profiles"])
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print_summary(current, None)
+        print(f"Baseline updated: {baseline_path}")
+    elif baseline_path.exists():
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)
+        tolerances = baseline.get("tolerances") or DEFAULT_TOLERANCES
+        if metrics:
+            # Machine-dependent metrics such as wall time are only gated on the baseline's machine
+            tolerances = {metric: tolerances[metric] for metric in metrics if metric in tolerances}
+        comparison = compare_to_baseline(current, baseline, tolerances)
+        print_summary(current, comparison)
+        failed = failed or bool(comparison["regressions"])
+    else:
+        print_summary(current, None)
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,803 @@
+#!/usr/bin/env python3
+"""
+DREAMSCAPE PromQL Cost Analyzer
+Estimates the evaluation cost of Prometheus rules and Grafana dashboard queries
+"""
+
+import argparse
+import json
+import logging
+import math
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Sequence, Tuple
+
+import yaml
+
+# libyaml's loader is several times faster on the larger rule files when available
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+RULE_FILE_GLOBS = ("prometheus/*.yaml", "prometheus/*.yml", "rules/*.yaml", "rules/*.yml")
+SCRAPE_FILE_GLOBS = ("prometheus.yml", "prometheus/*.yaml", "prometheus/*.yml")
+DASHBOARD_GLOBS = ("grafana/*.json", "grafana/**/*.json")
+
+DEFAULT_INTERVAL_SECONDS = 15.0
+DEFAULT_SERIES = 100
+DEFAULT_MAX_DATA_POINTS = 1000
+DEFAULT_DASHBOARD_REFRESH_SECONDS = 300.0
+
+# Range windows this many times longer than the evaluation interval are flagged
+LONG_RANGE_RATIO = 60
+
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000}
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)")
+NUMBER_RE = re.compile(r"0x[0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+IDENT_RE = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*")
+MATCHER_RE = re.compile(r"""\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*(=~|!~|!=|=)\s*("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|`[^`]*`)\s*,?""")
+GRAFANA_VARIABLE_RE = re.compile(r"\$\{?(\w+)(?::\w+)?\}?")
+LITERAL_ALTERNATION_RE = re.compile(r"^[\w\-.]+(\|[\w\-.]+)*$")
+
+AGGREGATIONS = {
+    "sum", "avg", "min", "max", "count", "stddev", "stdvar", "topk", "bottomk",
+    "quantile", "count_values", "group", "limitk", "limit_ratio"
+}
+GROUPING_KEYWORDS = {"by", "without", "on", "ignoring", "group_left", "group_right"}
+KEYWORDS = GROUPING_KEYWORDS | {"bool", "offset", "and", "or", "unless", "atan2", "inf", "nan"}
+TWO_CHAR_OPERATORS = {"==", "!=", ">=", "<=", "=~", "!~"}
+# Binary operator precedence, loosest first
+BINARY_PRECEDENCE = {
+    "or": 1, "and": 2, "unless": 2,
+    "==": 3, "!=": 3, "<=": 3, "<": 3, ">=": 3, ">": 3,
+    "+": 4, "-": 4, "*": 5, "/": 5, "%": 5, "atan2": 5, "^": 6
+}
+
+
+def parse_duration(text: Any) -> Optional[float]:
+    """Convert a Prometheus/Grafana duration such as 1h30m into seconds"""
+    if not isinstance(text, str):
+        return None
+    text = text.strip()
+    if text.startswith("now-"):
+        text = text[4:]
+    parts = DURATION_RE.findall(text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        return None
+    return sum(float(n) * DURATION_UNITS[u] for n, u in parts)
+
+
+@dataclass
+class Matcher:
+    """A single label matcher inside a vector selector"""
+    label: str
+    op: str
+    value: str
+
+    @property
+    def is_wide_regex(self) -> bool:
+        """Regex matchers with wildcards cannot use the postings index selectively"""
+        return self.op == "=~" and (".*" in self.value or ".+" in self.value)
+
+
+@dataclass
+class Selector:
+    """A vector selector with its range window and the calls that enclose it"""
+    metric: Optional[str]
+    matchers: List[Matcher] = field(default_factory=list)
+    range_seconds: Optional[float] = None
+    subquery: Optional[Tuple[float, Optional[float]]] = None
+    functions: List[str] = field(default_factory=list)
+
+    @property
+    def is_recorded(self) -> bool:
+        """Recording rule outputs follow the level:metric:operations naming convention"""
+        return bool(self.metric) and ":" in self.metric
+
+
+@dataclass
+class Aggregation:
+    """An aggregation operator and the slice of selectors it covers"""
+    name: str
+    labels: List[str]
+    without: bool
+    outermost: bool
+    start: int
+    end: int = -1
+
+
+@dataclass
+class ParsedExpr:
+    """Selectors and aggregations extracted from one PromQL expression"""
+    expr: str
+    selectors: List[Selector]
+    aggregations: List[Aggregation]
+
+    @property
+    def metrics(self) -> List[str]:
+        """Distinct metric names referenced by the expression"""
+        return list(dict.fromkeys(s.metric for s in self.selectors if s.metric))
+
+
+def _skip_string(text: str, start: int) -> int:
+    """Return the index just past the quoted string starting at ``start``"""
+    quote = text[start]
+    i = start + 1
+    while i < len(text):
+        if text[i] == "\\" and quote != "`":
+            i += 2
+            continue
+        if text[i] == quote:
+            return i + 1
+        i += 1
+    return len(text)
+
+
+def _parse_matchers(body: str) -> List[Matcher]:
+    """Parse the inside of a {...} label matcher block"""
+    return [Matcher(m.group(1), m.group(2), m.group(3)[1:-1]) for m in MATCHER_RE.finditer(body)]
+
+
+def _tokenize(expr: str) -> List[Tuple[str, Any]]:
+    """Split a PromQL expression into the tokens the selector walker needs"""
+    tokens: List[Tuple[str, Any]] = []
+    i = 0
+    while i < len(expr):
+        c = expr[i]
+        if c.isspace():
+            i += 1
+        elif c == "#":
+            newline = expr.find("\n", i)
+            i = len(expr) if newline == -1 else newline
+        elif c in "\"'`":
+            end = _skip_string(expr, i)
+            tokens.append(("string", expr[i:end]))
+            i = end
+        elif c == "{":
+            j = i + 1
+            while j < len(expr) and expr[j] != "}":
+                j = _skip_string(expr, j) if expr[j] in "\"'`" else j + 1
+            tokens.append(("matchers", _parse_matchers(expr[i + 1:j])))
+            i = j + 1
+        elif c == "[":
+            end = expr.find("]", i)
+            end = len(expr) if end == -1 else end
+            tokens.append(("range", expr[i + 1:end].strip()))
+            i = end + 1
+        elif c == "(":
+            tokens.append(("lparen", c))
+            i += 1
+        elif c == ")":
+            tokens.append(("rparen", c))
+            i += 1
+        elif c.isdigit() or (c == "." and i + 1 < len(expr) and expr[i + 1].isdigit()):
+            duration = DURATION_RE.match(expr, i)
+            number = NUMBER_RE.match(expr, i)
+            match = duration if duration and (not number or duration.end() > number.end()) else number
+            tokens.append(("number", match.group(0)))
+            i = match.end()
+        elif IDENT_RE.match(expr, i):
+            match = IDENT_RE.match(expr, i)
+            tokens.append(("ident", match.group(0)))
+            i = match.end()
+        else:
+            op = expr[i:i + 2] if expr[i:i + 2] in TWO_CHAR_OPERATORS else c
+            tokens.append(("op", op))
+            i += len(op)
+    return tokens
+
+
+def _parse_range(text: str) -> Tuple[Optional[float], Optional[Tuple[float, Optional[float]]]]:
+    """Parse a [range] or [range:step] suffix into a range window or a subquery"""
+    if ":" in text:
+        window, _, step = text.partition(":")
+        return None, (parse_duration(window) or 0.0, parse_duration(step))
+    return parse_duration(text), None
+
+
+def parse_promql(expr: str) -> ParsedExpr:
+    """Extract vector selectors and aggregations from a PromQL expression
+
+    This is not a full PromQL parser: it tracks just enough structure (calls,
+    grouping clauses, range windows and subqueries) to estimate query cost.
+    """
+    tokens = _tokenize(expr)
+    selectors: List[Selector] = []
+    aggregations: List[Aggregation] = []
+    stack: List[Dict[str, Any]] = []
+    last_closed: Optional[Dict[str, Any]] = None
+    pending_aggregation: Optional[Aggregation] = None
+
+    def token(index: int) -> Tuple[Optional[str], Any]:
+        return tokens[index] if index < len(tokens) else (None, None)
+
+    def grouping_labels(index: int) -> Tuple[List[str], int]:
+        labels, j = [], index + 1
+        while j < len(tokens) and tokens[j][0] != "rparen":
+            if tokens[j][0] == "ident":
+                labels.append(tokens[j][1])
+            j += 1
+        return labels, j + 1
+
+    def inside_aggregation() -> bool:
+        return any(entry.get("aggregation") for entry in stack)
+
+    def add_selector(metric: Optional[str], index: int) -> int:
+        selector = Selector(metric, functions=[e["name"] for e in reversed(stack) if e["name"]])
+        if token(index)[0] == "matchers":
+            selector.matchers = token(index)[1]
+            index += 1
+        if token(index)[0] == "range":
+            selector.range_seconds, selector.subquery = _parse_range(token(index)[1])
+            index += 1
+        selectors.append(selector)
+        return index
+
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+        next_kind, next_value = token(i + 1)
+
+        if kind == "ident":
+            lowered = value.lower()
+            if lowered in GROUPING_KEYWORDS:
+                if next_kind != "lparen":
+                    i += 1
+                    continue
+                labels, i = grouping_labels(i + 1)
+                target = pending_aggregation or (last_closed or {}).get("aggregation")
+                if lowered in ("by", "without") and target is not None:
+                    target.labels = labels
+                    target.without = lowered == "without"
+                continue
+            if lowered == "offset":
+                i += 2
+                while token(i)[0] == "op" and token(i)[1] == "-":
+                    i += 1
+                continue
+            if lowered in KEYWORDS:
+                i += 1
+                continue
+            if lowered in AGGREGATIONS and (next_kind == "lparen" or (
+                    next_kind == "ident" and next_value.lower() in ("by", "without"))):
+                pending_aggregation = Aggregation(lowered, [], False, not inside_aggregation(), len(selectors))
+                if next_kind == "ident":
+                    i += 1
+                    continue
+            if next_kind == "lparen":
+                entry = {"name": lowered, "start": len(selectors)}
+                if pending_aggregation is not None and pending_aggregation.name == lowered:
+                    entry["aggregation"] = pending_aggregation
+                    aggregations.append(pending_aggregation)
+                    pending_aggregation = None
+                stack.append(entry)
+                i += 2
+                continue
+            i = add_selector(value, i + 1)
+            continue
+
+        if kind == "lparen":
+            if pending_aggregation is not None:
+                stack.append({"name": pending_aggregation.name, "start": len(selectors),
+                              "aggregation": pending_aggregation})
+                aggregations.append(pending_aggregation)
+                pending_aggregation = None
+            else:
+                stack.append({"name": None, "start": len(selectors)})
+            i += 1
+            continue
+
+        if kind == "rparen":
+            last_closed = stack.pop() if stack else None
+            if last_closed and last_closed.get("aggregation"):
+                last_closed["aggregation"].end = len(selectors)
+            if last_closed and next_kind == "range" and ":" in next_value:
+                _, subquery = _parse_range(next_value)
+                for selector in selectors[last_closed["start"]:]:
+                    selector.subquery = subquery
+                i += 2
+                continue
+            i += 1
+            continue
+
+        if kind == "matchers":
+            metric = next((m.value for m in value if m.label == "__name__" and m.op == "="), None)
+            i = add_selector(metric, i)
+            continue
+
+        i += 1
+
+    for aggregation in aggregations:
+        if aggregation.end < 0:
+            aggregation.end = len(selectors)
+    return ParsedExpr(expr, selectors, aggregations)
+
+
+def normalize_tokens(expr: str) -> List[str]:
+    """Canonical tokens used to spot queries that recompute a recording rule"""
+    parts = []
+    for kind, value in _tokenize(expr):
+        if kind == "matchers":
+            parts.append("{" + ",".join(sorted(f'{m.label}{m.op}"{m.value}"' for m in value)) + "}")
+        elif kind == "range":
+            parts.append(f"[{value}]")
+        elif kind == "ident" and value.lower() in KEYWORDS | AGGREGATIONS:
+            parts.append(value.lower())
+        else:
+            parts.append(str(value))
+    return parts
+
+
+def normalize_expr(expr: str) -> str:
+    """Canonical form used to spot queries that recompute a recording rule"""
+    return "".join(normalize_tokens(expr))
+
+
+def _loosest_operator(tokens: Sequence[str]) -> Optional[int]:
+    """Precedence of the loosest binary operator outside parentheses, if any"""
+    depth, loosest = 0, None
+    for token in tokens:
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and token in BINARY_PRECEDENCE:
+            loosest = min(loosest or BINARY_PRECEDENCE[token], BINARY_PRECEDENCE[token])
+    return loosest
+
+
+def contains_subexpression(tokens: Sequence[str], pattern: Sequence[str]) -> bool:
+    """Whether normalized ``pattern`` tokens occur in ``tokens`` as a whole subexpression
+
+    Whole tokens keep ``rate(`` from matching inside ``irate(``. A match followed
+    by a by/without clause is a differently grouped aggregation, and a pattern
+    with a top-level operator must not bind to a tighter neighbouring operator.
+    """
+    size, loosest = len(pattern), _loosest_operator(pattern)
+    for start in range(len(tokens) - size + 1):
+        if list(tokens[start:start + size]) != list(pattern):
+            continue
+        before = tokens[start - 1] if start else None
+        after = tokens[start + size] if start + size < len(tokens) else None
+        if after in ("by", "without"):
+            continue
+        if loosest is not None and max(BINARY_PRECEDENCE.get(before, 0), BINARY_PRECEDENCE.get(after, 0)) >= loosest:
+            continue
+        return True
+    return False
+
+
+class CardinalitySnapshot:
+    """Series counts per metric and distinct value counts per label"""
+
+    def __init__(self, series: Optional[Dict[str, int]] = None, label_values: Optional[Dict[str, int]] = None,
+                 source: Optional[str] = None):
+        self.series = series or {}
+        self.label_values = label_values or {}
+        self.source = source
+
+    @classmethod
+    def load(cls, path: Optional[Path]) -> "CardinalitySnapshot":
+        """Load a snapshot from /api/v1/status/tsdb output or a {series, label_values} file"""
+        if not path or not Path(path).exists():
+            return cls()
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        if isinstance(data.get("data"), dict):
+            tsdb = data["data"]
+            return cls(
+                {item["name"]: int(item["value"]) for item in tsdb.get("seriesCountByMetricName", [])},
+                {item["name"]: int(item["value"]) for item in tsdb.get("labelValueCountByLabelName", [])},
+                str(path)
+            )
+        if "series" in data:
+            return cls(data.get("series", {}), data.get("label_values", {}), str(path))
+        return cls({k: int(v) for k, v in data.items()}, {}, str(path))
+
+
+@dataclass
+class QueryItem:
+    """A costed PromQL expression from a rule file or a dashboard"""
+    id: str
+    kind: str
+    file: str
+    expr: str
+    parsed: ParsedExpr
+    interval_seconds: float
+    points_per_evaluation: float = 1.0
+    record: Optional[str] = None
+    group: Optional[str] = None
+    series: int = 0
+    samples_per_evaluation: float = 0.0
+    flags: List[str] = field(default_factory=list)
+
+    @property
+    def samples_per_second(self) -> float:
+        """Average samples read per second at the configured evaluation frequency"""
+        return self.samples_per_evaluation * self.points_per_evaluation / self.interval_seconds
+
+
+class PromQLCostAnalyzer:
+    """Parses the monitoring stack's PromQL and ranks it by estimated evaluation cost"""
+
+    def __init__(self, monitoring_path: Path, snapshot: Optional[CardinalitySnapshot] = None,
+                 default_series: int = DEFAULT_SERIES, top_n: int = 20, logger: Optional[logging.Logger] = None):
+        self.monitoring_path = Path(monitoring_path)
+        self.snapshot = snapshot or CardinalitySnapshot()
+        self.default_series = default_series
+        self.top_n = top_n
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.scrape_interval = DEFAULT_INTERVAL_SECONDS
+        self.evaluation_interval = DEFAULT_INTERVAL_SECONDS
+        self.job_intervals: Dict[str, float] = {}
+        self.items: List[QueryItem] = []
+        self.recording_rules: Dict[str, QueryItem] = {}
+        self._series_cache: Dict[str, int] = {}
+
+    def _relative(self, path: Path) -> str:
+        """Path relative to the monitoring directory for reporting"""
+        try:
+            return str(path.relative_to(self.monitoring_path))
+        except ValueError:
+            return str(path)
+
+    def _files(self, patterns: Iterable[str]) -> List[Path]:
+        """Expand glob patterns below the monitoring directory without duplicates"""
+        files: Dict[Path, None] = {}
+        for pattern in patterns:
+            for path in sorted(self.monitoring_path.glob(pattern)):
+                files[path] = None
+        return list(files)
+
+    @staticmethod
+    def _load_yaml_documents(path: Path) -> List[Any]:
+        """Load every YAML document in a file, ignoring unparsable files"""
+        with open(path, 'r') as f:
+            try:
+                return [doc for doc in yaml.load_all(f, Loader=YAML_LOADER) if doc is not None]
+            except yaml.YAMLError:
+                return []
+
+    @staticmethod
+    def _walk(node: Any, key: str) -> Iterable[Any]:
+        """Yield every value stored under ``key`` anywhere in a nested structure"""
+        if isinstance(node, dict):
+            for k, v in node.items():
+                if k == key:
+                    yield v
+                yield from PromQLCostAnalyzer._walk(v, key)
+        elif isinstance(node, list):
+            for v in node:
+                yield from PromQLCostAnalyzer._walk(v, key)
+
+    def load_scrape_configs(self):
+        """Read global intervals and per-job scrape intervals"""
+        for path in self._files(SCRAPE_FILE_GLOBS):
+            for doc in self._load_yaml_documents(path):
+                if not isinstance(doc, dict):
+                    continue
+                global_config = doc.get("global", {}) if isinstance(doc.get("global"), dict) else {}
+                if path.name == "prometheus.yml":
+                    self.scrape_interval = parse_duration(global_config.get("scrape_interval")) or self.scrape_interval
+                    self.evaluation_interval = (parse_duration(global_config.get("evaluation_interval"))
+                                                or self.evaluation_interval)
+                for scrape_configs in self._walk(doc, "scrape_configs"):
+                    for job in scrape_configs if isinstance(scrape_configs, list) else []:
+                        if isinstance(job, dict) and job.get("job_name"):
+                            self.job_intervals[job["job_name"]] = (parse_duration(job.get("scrape_interval"))
+                                                                   or self.scrape_interval)
+
+    def load_rules(self):
+        """Collect recording and alerting rules from every rule group in the rule files"""
+        for path in self._files(RULE_FILE_GLOBS):
+            for doc in self._load_yaml_documents(path):
+                for groups in self._walk(doc, "groups"):
+                    for group in groups if isinstance(groups, list) else []:
+                        if not isinstance(group, dict) or not isinstance(group.get("rules"), list):
+                            continue
+                        interval = parse_duration(group.get("interval")) or self.evaluation_interval
+                        for rule in group["rules"]:
+                            if not isinstance(rule, dict) or "expr" not in rule:
+                                continue
+                            expr = str(rule["expr"]).strip()
+                            name = rule.get("record") or rule.get("alert")
+                            item = QueryItem(
+                                id=f"{self._relative(path)}:{group.get('name')}:{name}",
+                                kind="recording_rule" if rule.get("record") else "alert",
+                                file=self._relative(path), expr=expr, parsed=parse_promql(expr),
+                                interval_seconds=interval, record=rule.get("record"), group=group.get("name")
+                            )
+                            self.items.append(item)
+                            if item.record:
+                                self.recording_rules.setdefault(item.record, item)
+
+    def _substitute_grafana_variables(self, expr: str, step: float, window: float) -> str:
+        """Replace Grafana template variables with durations the cost model understands"""
+        builtins = {
+            "__rate_interval": f"{int(max(4 * self.scrape_interval, step + self.scrape_interval))}s",
+            "__interval": f"{int(step)}s",
+            "__range": f"{int(window)}s"
+        }
+
+        def replace(match: re.Match) -> str:
+            return builtins.get(match.group(1), f"{int(step)}s")
+
+        # Variables inside label values stay as-is; only ranges and bare variables are rewritten
+        return re.sub(r"\[[^\]]*\]", lambda m: GRAFANA_VARIABLE_RE.sub(replace, m.group(0)), expr)
+
+    def _dashboard_panels(self, node: Any) -> Iterable[Dict[str, Any]]:
+        """Yield panels including those nested inside collapsed rows"""
+        for panel in node.get("panels", []) if isinstance(node, dict) else []:
+            if isinstance(panel, dict):
+                yield panel
+                yield from self._dashboard_panels(panel)
+
+    def load_dashboards(self):
+        """Collect every Prometheus query from the Grafana dashboards"""
+        for path in self._files(DASHBOARD_GLOBS):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            dashboard = data.get("dashboard", data) if isinstance(data, dict) else {}
+            refresh = parse_duration(dashboard.get("refresh")) or DEFAULT_DASHBOARD_REFRESH_SECONDS
+            window = parse_duration((dashboard.get("time") or {}).get("from")) or 3600.0
+
+            for panel in self._dashboard_panels(dashboard):
+                max_points = panel.get("maxDataPoints") or DEFAULT_MAX_DATA_POINTS
+                min_step = parse_duration(panel.get("interval")) or 0.0
+                for target in panel.get("targets", []) or []:
+                    expr = target.get("expr") if isinstance(target, dict) else None
+                    if not expr:
+                        continue
+                    step = max(window / max_points, min_step, parse_duration(target.get("interval")) or 0.0,
+                               self.scrape_interval)
+                    points = 1.0 if target.get("instant") else window / step
+                    expr = self._substitute_grafana_variables(expr, step, window)
+                    self.items.append(QueryItem(
+                        id=f"{self._relative(path)}:{panel.get('title', panel.get('id'))}#{target.get('refId', '?')}",
+                        kind="dashboard_query", file=self._relative(path), expr=expr,
+                        parsed=parse_promql(expr), interval_seconds=refresh, points_per_evaluation=points
+                    ))
+
+    def _distinct_values(self, label: str) -> Optional[int]:
+        """Distinct values for a label, if the snapshot knows it"""
+        return self.snapshot.label_values.get(label)
+
+    def _metric_series(self, metric: Optional[str], visiting: Tuple[str, ...] = ()) -> int:
+        """Series behind a metric name, estimating recording rule outputs from their inputs"""
+        if not metric:
+            return self.default_series
+        if metric in self.snapshot.series:
+            return self.snapshot.series[metric]
+        if metric in self._series_cache:
+            return self._series_cache[metric]
+        rule = self.recording_rules.get(metric)
+        if rule is None or metric in visiting:
+            return self.default_series
+        series = self._output_series(rule.parsed, visiting + (metric,))
+        self._series_cache[metric] = series
+        return series
+
+    def _selector_series(self, selector: Selector, visiting: Tuple[str, ...] = ()) -> int:
+        """Series touched by a selector after applying label matcher selectivity"""
+        series = float(self._metric_series(selector.metric, visiting))
+        for matcher in selector.matchers:
+            if matcher.label == "__name__":
+                continue
+            distinct = self._distinct_values(matcher.label)
+            if not distinct:
+                continue
+            if matcher.op == "=":
+                series /= distinct
+            elif matcher.op == "=~" and LITERAL_ALTERNATION_RE.match(matcher.value):
+                series *= min(1.0, (matcher.value.count("|") + 1) / distinct)
+        return max(1, math.ceil(series))
+
+    def _output_series(self, parsed: ParsedExpr, visiting: Tuple[str, ...] = ()) -> int:
+        """Estimate how many series an expression returns"""
+        inputs = [self._selector_series(s, visiting) for s in parsed.selectors]
+        estimates, covered = [], set()
+        for aggregation in parsed.aggregations:
+            if not aggregation.outermost:
+                continue
+            covered.update(range(aggregation.start, aggregation.end))
+            input_series = max(inputs[aggregation.start:aggregation.end], default=1)
+            if aggregation.without:
+                estimates.append(input_series)
+            elif aggregation.labels:
+                grouped = 1
+                for label in aggregation.labels:
+                    grouped *= self._distinct_values(label) or input_series
+                estimates.append(min(input_series, grouped))
+            else:
+                estimates.append(1)
+        for index, selector in enumerate(parsed.selectors):
+            if index in covered:
+                continue
+            absent = any(f in ("absent", "absent_over_time") for f in selector.functions)
+            estimates.append(1 if absent else inputs[index])
+        return max(estimates, default=1)
+
+    def _scrape_interval_for(self, selector: Selector) -> float:
+        """Sample interval of the series a selector reads
+
+        Recorded series get one sample per rule evaluation; raw series use the
+        scrape interval of the matched job, falling back to the global one.
+        """
+        if selector.metric in self.recording_rules:
+            return self.recording_rules[selector.metric].interval_seconds
+        for matcher in selector.matchers:
+            if matcher.label != "job":
+                continue
+            if matcher.op == "=" and matcher.value in self.job_intervals:
+                return self.job_intervals[matcher.value]
+            if matcher.op == "=~":
+                try:
+                    matched = [v for job, v in self.job_intervals.items() if re.fullmatch(matcher.value, job)]
+                except re.error:
+                    matched = []
+                if matched:
+                    return min(matched)
+        return self.scrape_interval
+
+    def cost_item(self, item: QueryItem):
+        """Fill in series, samples per evaluation and flags for one query"""
+        samples = 0.0
+        series_total = 0
+        for selector in item.parsed.selectors:
+            series = self._selector_series(selector)
+            series_total += series
+            scrape = self._scrape_interval_for(selector)
+            points = (selector.range_seconds / scrape) if selector.range_seconds else 1.0
+            if selector.subquery:
+                window, step = selector.subquery
+                points *= max(1.0, window / (step or item.interval_seconds))
+            samples += series * max(points, 1.0)
+
+            for matcher in selector.matchers:
+                if matcher.is_wide_regex:
+                    item.flags.append(f"wide_regex:{matcher.label}=~\"{matcher.value}\"")
+            window = selector.subquery[0] if selector.subquery else selector.range_seconds
+            if window and window / item.interval_seconds >= LONG_RANGE_RATIO:
+                item.flags.append(f"long_range:{selector.metric}[{int(window)}s]@{int(item.interval_seconds)}s")
+
+        item.series = series_total
+        item.samples_per_evaluation = samples
+        item.flags = list(dict.fromkeys(item.flags))
+
+    def dependency_graph(self) -> Dict[str, Any]:
+        """Build the recording rule dependency graph and check it for waste"""
+        edges: Dict[str, List[str]] = {}
+        referenced = set()
+        undefined = set()
+        interval_mismatches = []
+
+        for item in self.items:
+            deps = [m for m in item.parsed.metrics if m in self.recording_rules]
+            referenced.update(deps)
+            undefined.update(m for m in item.parsed.metrics
+                             if ":" in m and m not in self.recording_rules and m not in self.snapshot.series)
+            if deps:
+                edges[item.record or item.id] = deps
+            if item.kind != "dashboard_query":
+                for dep in deps:
+                    source = self.recording_rules[dep]
+                    if item.interval_seconds < source.interval_seconds:
+                        interval_mismatches.append({
+                            "rule": item.record or item.id, "interval_seconds": item.interval_seconds,
+                            "input": dep, "input_interval_seconds": source.interval_seconds
+                        })
+
+        depth_cache: Dict[str, int] = {}
+
+        def depth(record: str, visiting: Tuple[str, ...] = ()) -> int:
+            if record in depth_cache:
+                return depth_cache[record]
+            if record in visiting:
+                return 0
+            deps = edges.get(record, [])
+            depth_cache[record] = 1 + max((depth(d, visiting + (record,)) for d in deps), default=0)
+            return depth_cache[record]
+
+        return {
+            "edges": edges,
+            "max_depth": max((depth(r) for r in self.recording_rules), default=0),
+            "unused_recording_rules": sorted(set(self.recording_rules) - referenced),
+            "undefined_recorded_metrics": sorted(undefined),
+            "interval_mismatches": interval_mismatches
+        }
+
+    def recording_rule_candidates(self) -> List[Dict[str, Any]]:
+        """Find dashboard and alert queries that recompute an existing recording rule"""
+        exact: Dict[Tuple[Tuple[str, ...], str], str] = {}
+        partial: Dict[Tuple[str, str, float], List[str]] = {}
+        for record, rule in self.recording_rules.items():
+            if rule.parsed.aggregations or any(s.functions for s in rule.parsed.selectors):
+                pattern = tuple(normalize_tokens(rule.expr))
+                exact[(pattern, "".join(pattern))] = record
+            for selector in rule.parsed.selectors:
+                if selector.range_seconds and selector.functions and not selector.is_recorded:
+                    key = (selector.functions[0], selector.metric, selector.range_seconds)
+                    partial.setdefault(key, []).append(record)
+
+        candidates = []
+        for item in self.items:
+            if item.kind == "recording_rule":
+                continue
+            normalized = normalize_tokens(item.expr)
+            text = "".join(normalized)
+            # The substring test is a cheap necessary condition; the token walk confirms boundaries
+            matches = [record for (pattern, joined), record in exact.items()
+                       if joined in text and contains_subexpression(normalized, pattern)]
+            if matches:
+                candidates.append({"query": item.id, "match": "exact", "recording_rules": sorted(set(matches))})
+                continue
+            if any(s.is_recorded for s in item.parsed.selectors):
+                continue
+            related = set()
+            for selector in item.parsed.selectors:
+                if selector.range_seconds and selector.functions:
+                    related.update(partial.get((selector.functions[0], selector.metric, selector.range_seconds), []))
+            if related and item.kind == "dashboard_query":
+                candidates.append({"query": item.id, "match": "partial", "recording_rules": sorted(related)})
+        return candidates
+
+    def analyze(self) -> Dict[str, Any]:
+        """Parse every rule and dashboard query, cost them and rank the most expensive"""
+        self.load_scrape_configs()
+        self.load_rules()
+        self.load_dashboards()
+        for item in self.items:
+            self.cost_item(item)
+
+        ranked = sorted(self.items, key=lambda i: i.samples_per_second, reverse=True)
+        totals: Dict[str, float] = {}
+        for item in self.items:
+            totals[item.kind] = totals.get(item.kind, 0.0) + item.samples_per_second
+
+        return {
+            "snapshot": self.snapshot.source,
+            "scrape_interval_seconds": self.scrape_interval,
+            "expressions": {kind: sum(1 for i in self.items if i.kind == kind) for kind in totals},
+            "samples_per_second": {kind: round(total, 1) for kind, total in totals.items()},
+            "top_costs": [{
+                "id": item.id,
+                "kind": item.kind,
+                "series": item.series,
+                "samples_per_evaluation": round(item.samples_per_evaluation, 1),
+                "interval_seconds": item.interval_seconds,
+                "samples_per_second": round(item.samples_per_second, 2),
+                "flags": item.flags,
+                "expr": " ".join(item.expr.split())[:200]
+            } for item in ranked[:self.top_n]],
+            "wide_regex_selectors": sorted({i.id for i in self.items if any(f.startswith("wide_regex") for f in i.flags)}),
+            "long_range_high_frequency": sorted({i.id for i in self.items if any(f.startswith("long_range") for f in i.flags)}),
+            "dependency_graph": self.dependency_graph(),
+            "recording_rule_candidates": self.recording_rule_candidates()
+        }
+
+
+def main():
+    """Analyze the monitoring directory and print the cost report"""
+    parser = argparse.ArgumentParser(description="Estimate PromQL evaluation cost for rules and dashboards")
+    parser.add_argument("--snapshot", help="Series cardinality snapshot (output of /api/v1/status/tsdb)")
+    parser.add_argument("--default-series", type=int, default=DEFAULT_SERIES,
+                        help="Series assumed for metrics missing from the snapshot")
+    parser.add_argument("--top", type=int, default=20, help="Number of most expensive expressions to list")
+    args = parser.parse_args()
+
+    analyzer = PromQLCostAnalyzer(
+        Path(__file__).parent,
+        CardinalitySnapshot.load(Path(args.snapshot) if args.snapshot else None),
+        default_series=args.default_series, top_n=args.top
+    )
+    json.dump(analyzer.analyze(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Analyzer registry selection and optional dependency tests"""
+
+import pytest
+
+from analyzer_registry import AnalyzerRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = AnalyzerRegistry()
+    calls = []
+
+    @registry.register("probe")
+    def probe(target):
+        calls.append("probe")
+        return {"databases": {}}
+
+    @registry.register("static")
+    def static(target):
+        return {"static": True}
+
+    @registry.register("readiness", depends_on=("static",), optional=("probe",))
+    def readiness(target, static=None, probe=None):
+        return {"static": static, "probe": probe}
+
+    @registry.register("patterns", depends_on=("readiness",))
+    def patterns(target, readiness=None):
+        return {"readiness": readiness}
+
+    registry.calls = calls
+    return registry
+
+
+@pytest.mark.parametrize("only, skip, order, dropped", [
+    (None, None, ["probe", "static", "readiness", "patterns"], []),
+    (None, ["probe"], ["static", "readiness", "patterns"], ["probe"]),
+    (None, ["static"], ["probe"], ["static", "readiness", "patterns"]),
+    (["readiness"], None, ["probe", "static", "readiness"], []),
+    (["patterns"], ["probe"], ["static", "readiness", "patterns"], ["probe"]),
+])
+def test_select(registry, only, skip, order, dropped):
+    assert registry.select(only, skip) == (order, dropped)
+
+
+def test_skipped_optional_dependency_is_passed_as_none(registry):
+    run = registry.run(None, skip=["probe"])
+
+    assert run.results["readiness"] == {"static": {"static": True}, "probe": None}
+    assert run.results["patterns"]["readiness"]["probe"] is None
+    assert registry.calls == []
+
+
+def test_optional_dependency_result_is_passed_when_run(registry):
+    run = registry.run(None)
+
+    assert run.results["readiness"]["probe"] == {"databases": {}}
+    assert registry.calls == ["probe"]
@@ -0,0 +1,397 @@
+"""Capacity planner tests: quantities, HCL resolution, kustomize rendering, JSON patches and the report"""
+
+import textwrap
+
+import pytest
+
+from capacity_planner import (
+    CapacityPlanner, KustomizeRenderer, _apply_json_patch, _hcl_blocks, _hcl_value, load_node_pools, parse_cpu,
+    parse_memory
+)
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(text).lstrip())
+    return path
+
+
+@pytest.mark.parametrize("value, millicores", [
+    ("250m", 250), ("0.5", 500), (2, 2000), ("1.25", 1250), (None, 0), ("bogus", 0),
+])
+def test_parse_cpu(value, millicores):
+    assert parse_cpu(value) == millicores
+
+
+@pytest.mark.parametrize("value, size", [
+    ("256Mi", 256 * 1024 ** 2), ("1Gi", 1024 ** 3), ("1G", 1000 ** 3), ("512", 512), ("1e3", 1000),
+    ("128k", 128000), (None, 0), ("bogus", 0),
+])
+def test_parse_memory(value, size):
+    assert parse_memory(value) == size
+
+
+@pytest.mark.parametrize("raw, value", [
+    ('"VM.Standard.A1.Flex"', "VM.Standard.A1.Flex"), ("true", True), ("false", False),
+    ("3", 3), ("1.5", 1.5), ("var.node_count", "var.node_count"),
+])
+def test_hcl_value(raw, value):
+    assert _hcl_value(raw) == value
+
+
+def test_hcl_blocks_match_nested_braces():
+    text = textwrap.dedent('''
+        variable "worker_count" {
+          default = 2
+        }
+
+        resource "oci_core_instance" "k3s_worker" {
+          count = var.worker_count
+          shape_config {
+            ocpus = 2
+          }
+        }
+    ''')
+
+    blocks = _hcl_blocks(text)
+
+    assert [(t, label, name) for t, label, name, _ in blocks] == [
+        ("variable", "worker_count", None), ("resource", "oci_core_instance", "k3s_worker")
+    ]
+    assert "shape_config {" in blocks[1][3] and blocks[1][3].rstrip().endswith("}")
+
+
+@pytest.mark.parametrize("tfvars, count, ocpus", [
+    (None, 2, 2.0),
+    ({"worker_count": 4}, 4, 2.0),
+    ({"worker_ocpus": 1}, 2, 1.0),
+])
+def test_load_node_pools_resolves_variables(tmp_path, tfvars, count, ocpus):
+    write(tmp_path / "variables.tf", '''
+        variable "worker_count" {
+          default = 2
+        }
+        variable "worker_ocpus" {
+          default = 2
+        }
+    ''')
+    write(tmp_path / "main.tf", '''
+        resource "oci_core_instance" "k3s_worker" {
+          count = var.worker_count
+          shape = "VM.Standard.A1.Flex"
+          shape_config {
+            ocpus         = var.worker_ocpus
+            memory_in_gbs = 12
+          }
+        }
+    ''')
+
+    pool, = load_node_pools(tmp_path, tfvars, {"default": {"cpu": "200m", "memory": "1Gi"}})
+
+    assert (pool.name, pool.count, pool.ocpus, pool.memory_gb) == ("k3s_worker", count, ocpus, 12.0)
+    assert pool.allocatable_cpu == int(ocpus * 1000) - 200
+    assert pool.allocatable_memory == 11 * 1024 ** 3
+
+
+@pytest.mark.parametrize("operations, expected", [
+    ([{"op": "add", "path": "/spec/replicas", "value": 3}], {"spec": {"replicas": 3, "items": [1, 2]}}),
+    ([{"op": "replace", "path": "/spec/items/0", "value": 9}], {"spec": {"items": [9, 2]}}),
+    ([{"op": "add", "path": "/spec/items/-", "value": 3}], {"spec": {"items": [1, 2, 3]}}),
+    ([{"op": "add", "path": "/spec/items/2", "value": 3}], {"spec": {"items": [1, 2, 3]}}),
+    ([{"op": "add", "path": "/spec/items/0", "value": 0}], {"spec": {"items": [0, 1, 2]}}),
+    ([{"op": "remove", "path": "/spec/items/1"}], {"spec": {"items": [1]}}),
+    ([{"op": "add", "path": "/spec/a~1b", "value": 1}], {"spec": {"items": [1, 2], "a/b": 1}}),
+])
+def test_apply_json_patch(operations, expected):
+    doc = {"spec": {"items": [1, 2]}}
+
+    _apply_json_patch(doc, operations)
+
+    assert doc == expected
+
+
+@pytest.mark.parametrize("operation, error", [
+    ({"op": "add", "path": "/spec/template/replicas", "value": 1}, KeyError),
+    ({"op": "replace", "path": "/spec/replicas", "value": 1}, KeyError),
+    ({"op": "remove", "path": "/spec/replicas"}, KeyError),
+    ({"op": "replace", "path": "/spec/items/2", "value": 1}, IndexError),
+    ({"op": "add", "path": "/spec/items/3", "value": 1}, IndexError),
+    ({"op": "add", "path": "/spec/items/x", "value": 1}, ValueError),
+    ({"op": "add", "path": "/spec/items/0/name", "value": 1}, TypeError),
+    ({"op": "move", "from": "/spec/items", "path": "/spec/moved"}, ValueError),
+])
+def test_apply_json_patch_rejects_missing_paths(operation, error):
+    with pytest.raises(error):
+        _apply_json_patch({"spec": {"items": [1, 2]}}, [operation])
+
+
+DEPLOYMENT = '''
+    apiVersion: apps/v1
+    kind: Deployment
+    metadata:
+      name: auth-service
+    spec:
+      replicas: 1
+      template:
+        spec:
+          containers:
+            - name: auth
+              resources:
+                requests:
+                  cpu: 100m
+'''
+
+
+@pytest.fixture
+def tree(tmp_path):
+    write(tmp_path / "base" / "deployment.yaml", DEPLOYMENT)
+    write(tmp_path / "base" / "kustomization.yaml", '''
+        resources:
+          - deployment.yaml
+    ''')
+    return tmp_path
+
+
+def render_overlay(tree, kustomization, files=None, renderer=None):
+    for name, text in (files or {}).items():
+        write(tree / "overlay" / name, text)
+    write(tree / "overlay" / "kustomization.yaml", kustomization)
+    renderer = renderer or KustomizeRenderer()
+    docs = renderer.render(tree / "overlay")
+    return docs, renderer.warnings
+
+
+def test_render_namespace_and_replicas(tree):
+    docs, warnings = render_overlay(tree, '''
+        namespace: prod
+        resources:
+          - ../base
+        replicas:
+          - name: auth-service
+            count: 3
+    ''')
+
+    deployment, = docs
+    assert deployment["metadata"]["namespace"] == "prod"
+    assert deployment["spec"]["replicas"] == 3
+    assert warnings == []
+
+
+@pytest.mark.parametrize("kustomization, files, cpu, warned", [
+    ('''
+        resources: [../base]
+        patches:
+          - target: {kind: Deployment, name: auth-.*}
+            patch: |-
+              - op: replace
+                path: /spec/template/spec/containers/0/resources/requests/cpu
+                value: 500m
+    ''', None, "500m", None),
+    ('''
+        resources: [../base]
+        patchesJson6902:
+          - target: {group: apps, version: v1, kind: Deployment, name: auth-service}
+            path: cpu-patch.yaml
+    ''', {"cpu-patch.yaml": '''
+        - op: replace
+          path: /spec/template/spec/containers/0/resources/requests/cpu
+          value: 250m
+    '''}, "250m", None),
+    ('''
+        resources: [../base]
+        patchesJson6902:
+          - target: {kind: Deployment, name: auth-.*}
+            patch: '[{"op": "replace", "path": "/spec/replicas", "value": 5}]'
+    ''', None, "100m", None),
+    ('''
+        resources: [../base]
+        patchesStrategicMerge:
+          - cpu-patch.yaml
+    ''', None, "100m", "patchesStrategicMerge is not evaluated"),
+    ('''
+        resources: [../base]
+        patches:
+          - target: {kind: Deployment}
+            patch: |-
+              - op: replace
+                path: /spec/template/spec/containers/0/resources/requests/cpu
+                value: 900m
+              - op: replace
+                path: /spec/template/spec/containers/0/resources/limits/cpu
+                value: 900m
+    ''', None, "100m", "Patch failed on Deployment/auth-service"),
+])
+def test_render_patches(tree, kustomization, files, cpu, warned):
+    docs, warnings = render_overlay(tree, kustomization, files)
+
+    deployment, = docs
+    assert deployment["spec"]["template"]["spec"]["containers"][0]["resources"]["requests"]["cpu"] == cpu
+    if warned:
+        assert any(warned in warning for warning in warnings)
+    else:
+        assert warnings == []
+
+
+def test_render_does_not_leak_patches_into_shared_bases(tree):
+    renderer = KustomizeRenderer()
+    render_overlay(tree, '''
+        resources: [../base]
+        patches:
+          - target: {kind: Deployment}
+            patch: '[{"op": "replace", "path": "/spec/replicas", "value": 7}]'
+    ''', renderer=renderer)
+
+    deployment, = renderer.render(tree / "base")
+
+    assert deployment["spec"]["replicas"] == 1
+    assert renderer.files_read == 3
+
+
+@pytest.fixture
+def infra(tmp_path):
+    """Two overlays over a base with an HPA-scaled api, an oversized db and a worker without requests"""
+    write(tmp_path / "terraform" / "modules" / "k3s" / "main.tf", '''
+        resource "oci_core_instance" "k3s_worker" {
+          count = 2
+          shape = "VM.Standard.A1.Flex"
+          shape_config {
+            ocpus         = 2
+            memory_in_gbs = 8
+          }
+        }
+    ''')
+    write(tmp_path / "k8s" / "base" / "kustomization.yaml", '''
+        resources: [api.yaml, db.yaml, worker.yaml]
+    ''')
+    write(tmp_path / "k8s" / "base" / "api.yaml", '''
+        apiVersion: apps/v1
+        kind: Deployment
+        metadata: {name: api}
+        spec:
+          replicas: 1
+          template:
+            spec:
+              containers:
+                - name: api
+                  resources:
+                    requests: {cpu: 500m, memory: 512Mi}
+                    limits: {cpu: "2", memory: 1Gi}
+        ---
+        apiVersion: autoscaling/v2
+        kind: HorizontalPodAutoscaler
+        metadata: {name: api}
+        spec:
+          scaleTargetRef: {apiVersion: apps/v1, kind: Deployment, name: api}
+          minReplicas: 2
+          maxReplicas: 4
+    ''')
+    write(tmp_path / "k8s" / "base" / "db.yaml", '''
+        apiVersion: apps/v1
+        kind: StatefulSet
+        metadata: {name: db}
+        spec:
+          template:
+            spec:
+              containers:
+                - name: db
+                  resources:
+                    requests: {cpu: "2", memory: 1Gi}
+                    limits: {cpu: "2", memory: 2Gi}
+    ''')
+    write(tmp_path / "k8s" / "base" / "worker.yaml", '''
+        apiVersion: apps/v1
+        kind: Deployment
+        metadata: {name: worker}
+        spec:
+          template:
+            spec:
+              containers:
+                - name: worker
+                  image: worker
+    ''')
+    write(tmp_path / "k8s" / "overlays" / "staging" / "kustomization.yaml", '''
+        resources: [../../base]
+    ''')
+    write(tmp_path / "k8s" / "overlays" / "production" / "kustomization.yaml", '''
+        resources: [../../base]
+        replicas:
+          - name: api
+            count: 3
+        patches:
+          - target: {kind: HorizontalPodAutoscaler, name: api}
+            patch: '[{"op": "replace", "path": "/spec/maxReplicas", "value": 6}]'
+    ''')
+    return tmp_path
+
+
+@pytest.fixture
+def report(infra):
+    return CapacityPlanner(infra, {"node_reserved": {"default": {"cpu": "200m", "memory": "1Gi"}}}).analyze()
+
+
+def test_report_node_pools(report):
+    assert report["node_pools"] == [{
+        "name": "k3s_worker", "count": 2, "shape": "VM.Standard.A1.Flex", "vcpus_per_node": 2.0,
+        "memory_gb_per_node": 8.0, "allocatable_per_node": {"cpu_millicores": 1800, "memory_mib": 7168}
+    }]
+    assert report["warnings"] == []
+
+
+def test_workloads_pair_hpa_with_target(infra):
+    planner = CapacityPlanner(infra)
+
+    workloads = {w.name: w for w in planner.workloads("production", infra / "k8s" / "overlays" / "production")}
+
+    assert sorted(workloads) == ["api", "db", "worker"]
+    assert (workloads["api"].hpa_min, workloads["api"].hpa_max) == (2, 6)
+    assert (workloads["api"].current_replicas, workloads["api"].max_replicas) == (3, 6)
+    assert (workloads["db"].hpa_max, workloads["db"].current_replicas, workloads["db"].max_replicas) == (None, 1, 1)
+
+
+# Each environment: pods, worst-case requests at HPA max, headroom on 2 x (1800m, 7168Mi) and placement
+@pytest.mark.parametrize("environment, pods, requests_max, headroom, unschedulable", [
+    # HPA minimum (2) beats replicas: 1, so 2 api pods at rest and 4 at full scale
+    ("staging", {"current": 4, "max": 6}, {"cpu_millicores": 4000, "memory_mib": 3072},
+     {"cpu_millicores": -400, "memory_mib": 11264, "cpu_percent_used": 111.1, "memory_percent_used": 21.4},
+     {"unschedulable_pods": 1, "by_workload": {"db": 1}}),
+    # Overlay replicas and the patched HPA maximum; six 500m api pods still fit three per node
+    ("production", {"current": 5, "max": 8}, {"cpu_millicores": 5000, "memory_mib": 4096},
+     {"cpu_millicores": -1400, "memory_mib": 10240, "cpu_percent_used": 138.9, "memory_percent_used": 28.6},
+     {"unschedulable_pods": 1, "by_workload": {"db": 1}}),
+])
+def test_environment_summary(report, environment, pods, requests_max, headroom, unschedulable):
+    summary = report["environments"][environment]
+
+    assert summary["workloads"] == 3
+    assert summary["pods"] == pods
+    assert summary["requests"]["max"] == requests_max
+    assert summary["headroom_at_max"] == headroom
+    assert summary["oversized_pods"] == ["db"]
+    assert summary["placement_at_max"] == unschedulable
+
+
+def test_all_environments_share_the_nodes(report):
+    combined = report["all_environments"]
+
+    assert combined["pods"] == {"current": 9, "max": 14}
+    assert combined["requests"]["current"] == {"cpu_millicores": 6500, "memory_mib": 4608}
+    assert combined["limits"]["max"] == {"cpu_millicores": 24000, "memory_mib": 14336}
+    assert combined["placement_at_max"] == {"unschedulable_pods": 6, "by_workload": {"db": 2, "api": 4}}
+
+
+def test_throttling_risks(report):
+    risks = {(r["environment"], r["workload"]): r for r in report["throttling_risks"]}
+
+    assert sorted(risks) == [("production", "api"), ("production", "worker"), ("staging", "api"), ("staging", "worker")]
+    assert risks[("staging", "api")]["reasons"] == ["cpu_limit_request_ratio"]
+    assert (risks[("staging", "api")]["cpu_limit_ratio"], risks[("staging", "api")]["memory_limit_ratio"]) == (4.0, 2.0)
+    assert risks[("staging", "worker")]["reasons"] == ["missing_requests", "no_cpu_limit"]
+
+
+def test_limit_ratio_thresholds_come_from_settings(infra):
+    planner = CapacityPlanner(infra, {"max_cpu_limit_ratio": 4, "max_memory_limit_ratio": 1.5})
+
+    reasons = {r["workload"]: r["reasons"] for r in planner.analyze()["throttling_risks"]}
+
+    assert reasons == {"api": ["memory_limit_request_ratio"], "db": ["memory_limit_request_ratio"],
+                       "worker": ["missing_requests", "no_cpu_limit"]}
@@ -0,0 +1,366 @@
+"""Live database probe tests with stand-in drivers"""
+
+import asyncio
+import importlib.util
+import logging
+import sqlite3
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from database_probe import DatabaseProbeCollector, summarize_probe_health
+
+
+def collector(monkeypatch, timeout=0.2):
+    monkeypatch.setenv("TEST_PROBE_URL", "db://stand-in")
+    return DatabaseProbeCollector({"live_probes": {
+        "timeout_seconds": timeout,
+        "targets": {"postgresql": {"url_env": "TEST_PROBE_URL"}, "redis": {"url_env": "UNSET_PROBE_URL"}}
+    }})
+
+
+async def slow_probe(url):
+    await asyncio.sleep(1)
+    return {}
+
+
+async def missing_driver(url):
+    import dreamscape_missing_driver  # noqa: F401
+
+
+async def refused(url):
+    raise ConnectionRefusedError("connection refused")
+
+
+async def healthy(url):
+    return {"replication": {"lag_seconds": 0.0}}
+
+
+@pytest.mark.parametrize("name, probe, status", [
+    ("postgresql", healthy, "ok"),
+    ("postgresql", slow_probe, "timeout"),
+    ("postgresql", missing_driver, "driver_missing"),
+    ("postgresql", refused, "unreachable"),
+    ("redis", healthy, "not_configured"),
+])
+def test_run_probe_status(monkeypatch, name, probe, status):
+    result = asyncio.run(collector(monkeypatch)._run_probe(name, probe))
+
+    assert result["status"] == status
+
+
+class OperationFailure(Exception):
+    """Stand-in for pymongo.errors.OperationFailure"""
+
+    def __init__(self, message, code, code_name):
+        super().__init__(message)
+        self.code = code
+        self.details = {"codeName": code_name}
+
+
+class FakeCollection:
+    async def count_documents(self, query):
+        return 0
+
+
+class FakeDatabase:
+    """Holds one collection and one view; collStats on the view fails like the real server"""
+
+    collections = {"users": "collection", "active_users": "view"}
+
+    async def command(self, name, *args):
+        if name == "collStats":
+            if self.collections[args[0]] == "view":
+                raise OperationFailure("Namespace is a view, not a collection", 166, "CommandNotSupportedOnView")
+            return {"ns": f"app.{args[0]}", "size": 100, "totalIndexSize": 20, "count": 3}
+        return {"dataSize": 10, "indexSize": 5}
+
+    async def list_collection_names(self, filter=None):
+        wanted = (filter or {}).get("type")
+        return [name for name, kind in self.collections.items() if wanted in (None, kind)]
+
+    def __getitem__(self, name):
+        return FakeCollection()
+
+
+def fake_motor(monkeypatch, error):
+    """Install a motor stand-in whose replSetGetStatus raises the given error"""
+
+    class Admin:
+        async def command(self, name):
+            raise error
+
+    class Client:
+        def __init__(self, url, **kwargs):
+            self.admin = Admin()
+
+        def get_default_database(self):
+            return FakeDatabase()
+
+        def close(self):
+            pass
+
+    motor = types.ModuleType("motor")
+    motor.motor_asyncio = types.SimpleNamespace(AsyncIOMotorClient=Client)
+    monkeypatch.setitem(sys.modules, "motor", motor)
+    monkeypatch.setitem(sys.modules, "motor.motor_asyncio", motor.motor_asyncio)
+
+
+@pytest.mark.parametrize("error, role, lag", [
+    (OperationFailure("not running with --replSet", 76, "NoReplicationEnabled"), "standalone", 0.0),
+    (OperationFailure("no replset config has been received", 94, "NotYetInitialized"), "standalone", 0.0),
+    (OperationFailure("command requires authentication", 13, "Unauthorized"), "unknown", None),
+    (TimeoutError("timed out"), "unknown", None),
+])
+def test_mongodb_replication_errors(monkeypatch, error, role, lag):
+    fake_motor(monkeypatch, error)
+
+    result = asyncio.run(collector(monkeypatch)._probe_mongodb("mongodb://stand-in"))
+
+    assert result["replication"]["role"] == role
+    assert result["replication"]["lag_seconds"] == lag
+
+
+def test_mongodb_sizes_skip_views(monkeypatch):
+    fake_motor(monkeypatch, OperationFailure("not running with --replSet", 76, "NoReplicationEnabled"))
+
+    result = asyncio.run(collector(monkeypatch)._probe_mongodb("mongodb://stand-in"))
+
+    assert result["sizes"]["collection_count"] == 1
+    assert result["sizes"]["largest_collections"] == [{"name": "app.users", "bytes": 120, "documents": 3}]
+
+
+class FakeConnection:
+    """asyncpg connection stand-in: migration history queries run on SQLite, the rest are canned"""
+
+    def __init__(self, history, answers):
+        self.history = history
+        self.answers = answers
+
+    def _answer(self, sql):
+        return next(value for fragment, value in self.answers.items() if fragment in sql)
+
+    async def fetchval(self, sql, *args):
+        if "to_regclass" in sql:
+            return bool(self.history.execute("SELECT 1 FROM sqlite_master WHERE name = ?", args).fetchone())
+        return self._answer(sql)
+
+    async def fetchrow(self, sql, *args):
+        cursor = self.history.execute(sql)
+        return dict(zip([column[0] for column in cursor.description], cursor.fetchone()))
+
+    async def fetch(self, sql, *args):
+        return self._answer(sql)
+
+
+def fake_asyncpg(monkeypatch, history, answers):
+    """Install an asyncpg stand-in whose pool hands out FakeConnection objects"""
+
+    class Acquire:
+        async def __aenter__(self):
+            return FakeConnection(history, answers)
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class Pool:
+        def acquire(self):
+            return Acquire()
+
+        async def close(self):
+            pass
+
+    async def create_pool(url, **kwargs):
+        return Pool()
+
+    monkeypatch.setitem(sys.modules, "asyncpg", types.SimpleNamespace(create_pool=create_pool))
+
+
+PRIMARY = {
+    "pg_database_size": 4096,
+    "count(*) FROM pg_stat_user_tables": 1,
+    "pg_stat_user_tables": [{"name": "public.users", "bytes": 2048, "rows": 10}],
+    "pg_is_in_recovery": False,
+    "pg_stat_replication": [],
+}
+
+
+def migration_history(flyway=(), prisma=()):
+    history = sqlite3.connect(":memory:")
+    if flyway:
+        history.execute("CREATE TABLE flyway_schema_history (installed_rank, version, success)")
+        history.executemany("INSERT INTO flyway_schema_history VALUES (?, ?, ?)", flyway)
+    if prisma:
+        history.execute("CREATE TABLE _prisma_migrations (migration_name, finished_at, rolled_back_at, logs)")
+        history.executemany("INSERT INTO _prisma_migrations VALUES (?, ?, ?, ?)", prisma)
+    return history
+
+
+@pytest.mark.parametrize("flyway, prisma, schema_versions", [
+    ([], [], {}),
+    # The repeatable R__ migration has no version and the highest rank; the failed V3 stays failed until repaired
+    ([(1, "1", 1), (2, "2", 1), (3, "3", 0), (4, None, 1)], [],
+     {"flyway": {"applied": 4, "failed": 1, "current_version": "2"}}),
+    # Resolved rollbacks are ignored, a migration still running has no logs yet
+    ([], [("001_init", "2026-01-01", None, None),
+          ("002_users", None, "2026-01-03", "column exists"),
+          ("003_orders", None, None, "relation missing"),
+          ("004_index", None, None, None)],
+     {"prisma": {"applied": 1, "failed": 1, "current_version": "001_init"}}),
+    ([], [("001_init", "2026-01-01", None, None), ("002_users", None, "2026-01-03", "column exists")],
+     {"prisma": {"applied": 1, "failed": 0, "current_version": "001_init"}}),
+])
+def test_postgresql_migration_history(monkeypatch, flyway, prisma, schema_versions):
+    fake_asyncpg(monkeypatch, migration_history(flyway, prisma), PRIMARY)
+
+    result = asyncio.run(collector(monkeypatch)._probe_postgresql("postgresql://stand-in"))
+
+    assert result["schema_versions"] == schema_versions
+    assert result["sizes"] == {"database_bytes": 4096, "table_count": 1,
+                               "largest_tables": [{"name": "public.users", "bytes": 2048, "rows": 10}]}
+
+
+@pytest.mark.parametrize("answers, replication", [
+    ({"pg_is_in_recovery": False, "pg_stat_replication": []}, {"role": "primary", "replicas": 0, "lag_seconds": 0.0}),
+    ({"pg_is_in_recovery": False, "pg_stat_replication": [{"application_name": "r1", "state": "streaming", "lag": 2.5},
+                                                          {"application_name": "r2", "state": "startup", "lag": None}]},
+     {"role": "primary", "replicas": 2, "lag_seconds": 2.5}),
+    ({"pg_is_in_recovery": True, "pg_last_wal_receive_lsn": 0}, {"role": "replica", "lag_seconds": 0.0}),
+    ({"pg_is_in_recovery": True, "pg_last_wal_receive_lsn": 12.5}, {"role": "replica", "lag_seconds": 12.5}),
+    ({"pg_is_in_recovery": True, "pg_last_wal_receive_lsn": None}, {"role": "replica", "lag_seconds": None}),
+])
+def test_postgresql_replication(monkeypatch, answers, replication):
+    fake_asyncpg(monkeypatch, migration_history(), dict(PRIMARY, **answers))
+
+    result = asyncio.run(collector(monkeypatch)._probe_postgresql("postgresql://stand-in"))
+
+    assert result["replication"] == replication
+
+
+def fake_redis(monkeypatch, sections):
+    """Install a redis.asyncio stand-in answering INFO from the given sections"""
+
+    class ConnectionPool:
+        @classmethod
+        def from_url(cls, url, **kwargs):
+            return cls()
+
+        async def disconnect(self):
+            pass
+
+    class Redis:
+        def __init__(self, connection_pool):
+            self.pool = connection_pool
+
+        async def info(self, section):
+            return sections[section]
+
+        async def aclose(self):
+            pass
+
+    asyncio_module = types.SimpleNamespace(ConnectionPool=ConnectionPool, Redis=Redis)
+    monkeypatch.setitem(sys.modules, "redis", types.SimpleNamespace(asyncio=asyncio_module))
+    monkeypatch.setitem(sys.modules, "redis.asyncio", asyncio_module)
+
+
+MEMORY_INFO = {"used_memory": 1024, "used_memory_peak": 2048, "maxmemory": 0,
+               "mem_fragmentation_ratio": 1.2, "maxmemory_policy": "allkeys-lru"}
+
+
+@pytest.mark.parametrize("replication_info, replication", [
+    ({"role": "master", "connected_slaves": 0}, {"role": "master", "replicas": 0, "lag_seconds": 0.0}),
+    ({"role": "master", "connected_slaves": 2,
+      "slave0": {"ip": "10.0.0.2", "state": "online", "lag": 3}, "slave1": {"ip": "10.0.0.3", "state": "online", "lag": 1}},
+     {"role": "master", "replicas": 2, "lag_seconds": 3.0}),
+    ({"role": "slave", "master_link_status": "up"}, {"role": "slave", "replicas": 0, "lag_seconds": 0.0}),
+])
+def test_redis_info_mapping(monkeypatch, replication_info, replication):
+    fake_redis(monkeypatch, {
+        "memory": MEMORY_INFO,
+        "keyspace": {"db0": {"keys": 12, "expires": 4, "avg_ttl": 0}},
+        "replication": replication_info
+    })
+
+    result = asyncio.run(collector(monkeypatch)._probe_redis("redis://stand-in"))
+
+    assert result["memory"] == {"used_bytes": 1024, "peak_bytes": 2048, "max_bytes": 0,
+                                "fragmentation_ratio": 1.2, "eviction_policy": "allkeys-lru"}
+    assert result["keyspace"] == {"db0": {"keys": 12, "expires": 4}}
+    assert result["replication"] == replication
+
+
+def test_summarize_probe_health():
+    live_metrics = {"databases": {
+        "postgresql": {"status": "ok", "replication": {"lag_seconds": 45.0},
+                       "schema_versions": {"flyway": {"failed": 1}}},
+        "mongodb": {"status": "ok", "replication": {"lag_seconds": None},
+                    "schema_versions": {"migrate_mongo": {"failed": 0}}},
+        "redis": {"status": "timeout"},
+        "cache": {"status": "driver_missing"},
+        "search": {"status": "not_configured"},
+    }}
+
+    health = summarize_probe_health(live_metrics, max_lag_seconds=30)
+
+    assert health == {
+        "unreachable": ["redis"],
+        "lagging": ["postgresql", "mongodb"],
+        "failed_migrations": ["postgresql:flyway"],
+    }
+
+
+@pytest.fixture(scope="module")
+def monitor():
+    path = Path(__file__).resolve().parent.parent / "database-migration-monitor.py"
+    spec = importlib.util.spec_from_file_location("database_migration_monitor", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    instance = module.DatabaseMigrationMonitor.__new__(module.DatabaseMigrationMonitor)
+    instance.config = {"monitoring_config": {"live_probes": {"max_replication_lag_seconds": 30}}}
+    instance.logger = logging.getLogger("test")
+    return instance
+
+
+READY_TERRAFORM = {
+    "database_resources": {"postgresql": {"enabled": True}},
+    "backup_configuration": {"enabled": True}
+}
+READY_KUBERNETES = {"service_config": {
+    "health_checks": True, "database_connection": True, "security_context": {"non_root": True}
+}}
+
+
+@pytest.mark.parametrize("databases, score, level", [
+    ({}, 100, "high"),
+    ({"postgresql": {"status": "ok", "replication": {"lag_seconds": 0.0}}}, 100, "high"),
+    ({"postgresql": {"status": "unreachable"}}, 90, "high"),
+    ({"postgresql": {"status": "ok", "replication": {"lag_seconds": 120.0}}}, 90, "high"),
+    ({"postgresql": {"status": "ok", "replication": {"lag_seconds": 0.0},
+                     "schema_versions": {"prisma": {"failed": 1}}}}, 90, "high"),
+    ({"postgresql": {"status": "ok", "replication": {"lag_seconds": 0.0},
+                     "schema_versions": {"prisma": {"applied": 3, "failed": 0}}}}, 100, "high"),
+    ({"postgresql": {"status": "timeout"},
+      "mongodb": {"status": "ok", "replication": {"lag_seconds": None},
+                  "schema_versions": {"migrate_mongo": {"failed": 1}}}}, 70, "medium"),
+])
+def test_readiness_live_database_penalties(monitor, databases, score, level):
+    readiness = monitor._assess_migration_readiness(
+        terraform=READY_TERRAFORM, kubernetes=READY_KUBERNETES, live_databases={"databases": databases}
+    )
+
+    assert readiness["score"] == score
+    assert readiness["level"] == level
+
+
+def test_readiness_score_never_negative(monitor):
+    live_databases = {"databases": {"postgresql": {
+        "status": "ok", "replication": {"lag_seconds": None}, "schema_versions": {"flyway": {"failed": 1}}
+    }}}
+
+    readiness = monitor._assess_migration_readiness(terraform={}, kubernetes={}, live_databases=live_databases)
+
+    assert readiness["score"] == 0
+    assert readiness["level"] == "low"
@@ -0,0 +1,223 @@
+"""GitHub watcher tests against a local stub of the GitHub API"""
+
+import asyncio
+import hashlib
+import json
+import socket
+import time
+
+from aiohttp import web
+
+from github_watcher import GitHubWatcher, RateLimitBudget
+
+
+class StubGitHub:
+    """Minimal newest-first pulls listing with ETags, pagination and fault injection"""
+
+    def __init__(self, per_page: int = 2):
+        self.per_page = per_page
+        self.pulls = []
+        self.failing_pages = set()
+        self.throttle_next = 0
+        self.core_remaining = 5000
+        self.core_reset = int(time.time()) + 3600
+        self.requests = []
+        self.not_modified = 0
+        # Keep one port across runs so ETag keys, which include the URL, stay stable
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+    def add_pull(self, number: int, updated_at: str):
+        self.pulls.append({"number": number, "updated_at": updated_at, "title": f"PR {number}"})
+        self.pulls.sort(key=lambda pr: pr["updated_at"], reverse=True)
+
+    async def rate_limit(self, request):
+        return web.json_response({"resources": {
+            "core": {"limit": 5000, "remaining": self.core_remaining, "reset": self.core_reset},
+            "search": {"limit": 30, "remaining": 30, "reset": self.core_reset}
+        }})
+
+    async def repository(self, request):
+        return web.json_response({"pushed_at": "2026-01-01T00:00:00Z", "open_issues_count": 0})
+
+    async def pulls_listing(self, request):
+        page = int(request.query.get("page", 1))
+        self.requests.append(page)
+        if self.throttle_next:
+            self.throttle_next -= 1
+            return web.Response(status=429, headers={"Retry-After": "0.1"})
+        if page in self.failing_pages:
+            return web.Response(status=502)
+
+        start = (page - 1) * self.per_page
+        body = self.pulls[start:start + self.per_page]
+        etag = '"' + hashlib.sha1(json.dumps(body).encode()).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304)
+
+        headers = {"ETag": etag}
+        if start + self.per_page < len(self.pulls):
+            query = dict(request.query, page=str(page + 1))
+            headers["Link"] = f'<{request.url.with_query(query)}>; rel="next"'
+        return web.json_response(body, headers=headers)
+
+    async def empty(self, request):
+        return web.json_response([])
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/rate_limit", self.rate_limit)
+        app.router.add_get("/repos/o/r", self.repository)
+        app.router.add_get("/repos/o/r/pulls", self.pulls_listing)
+        app.router.add_get("/repos/o/r/commits", self.empty)
+        return app
+
+
+def watch(stub: StubGitHub, state_path, **settings):
+    """Run one watch cycle against the stub and return the result for o/r"""
+
+    async def scenario():
+        runner = web.AppRunner(stub.app())
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", stub.port).start()
+        try:
+            config = {
+                "target_repositories": ["r"],
+                "github_watcher": dict({
+                    "api_url": f"http://127.0.0.1:{stub.port}",
+                    "default_owner": "o",
+                    "per_page": stub.per_page,
+                    "max_pages": 2,
+                    "rate_limit_reserve": 0
+                }, **settings)
+            }
+            watcher = GitHubWatcher(config, state_path)
+            result = await watcher.run()
+            return watcher, result["repositories"]["o/r"]
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(scenario())
+
+
+def numbers(repository):
+    return [pr["number"] for pr in repository["new_pull_requests"]]
+
+
+def test_not_modified_second_run_costs_no_items(tmp_path):
+    stub = StubGitHub()
+    state_path = tmp_path / "state.json"
+    stub.add_pull(1, "2026-01-01T00:00:00Z")
+
+    _, first = watch(stub, state_path)
+    _, second = watch(stub, state_path)
+    stub.add_pull(2, "2026-01-02T00:00:00Z")
+    _, third = watch(stub, state_path)
+
+    assert numbers(first) == [1]
+    assert numbers(second) == []
+    assert stub.not_modified == 1
+    assert numbers(third) == [2]
+
+
+def test_cursor_only_moves_forward(tmp_path):
+    stub = StubGitHub()
+    state_path = tmp_path / "state.json"
+    state_path.write_text(json.dumps({"cursors": {"pulls:o/r": "2026-03-01T00:00:00Z"}}))
+    stub.add_pull(1, "2026-01-01T00:00:00Z")
+
+    watcher, repository = watch(stub, state_path)
+
+    assert numbers(repository) == []
+    assert watcher.state["cursors"]["pulls:o/r"] == "2026-03-01T00:00:00Z"
+
+    stub.add_pull(2, "2026-04-01T00:00:00Z")
+    watcher, repository = watch(stub, state_path)
+
+    assert numbers(repository) == [2]
+    assert watcher.state["cursors"]["pulls:o/r"] == "2026-04-01T00:00:00Z"
+
+
+def test_failed_page_does_not_lose_items(tmp_path):
+    stub = StubGitHub()
+    state_path = tmp_path / "state.json"
+    stub.add_pull(1, "2026-01-01T00:00:00Z")
+    watch(stub, state_path)
+
+    for number in (2, 3, 4):
+        stub.add_pull(number, f"2026-01-0{number}T00:00:00Z")
+    stub.failing_pages = {2}
+    etags = json.loads(state_path.read_text())["etags"]
+    watcher, interrupted = watch(stub, state_path)
+
+    assert numbers(interrupted) == [4, 3]
+    assert watcher.state["cursors"]["pulls:o/r"] == "2026-01-01T00:00:00Z"
+    assert watcher.state["etags"] == etags
+
+    stub.failing_pages = set()
+    watcher, resumed = watch(stub, state_path)
+
+    assert numbers(resumed) == [2]
+    assert watcher.state["cursors"]["pulls:o/r"] == "2026-01-04T00:00:00Z"
+    assert watcher.state["resume"] == {}
+
+
+def test_truncated_listing_resumes_next_run(tmp_path):
+    stub = StubGitHub()
+    state_path = tmp_path / "state.json"
+    stub.add_pull(1, "2026-01-01T00:00:00Z")
+    watch(stub, state_path)
+
+    for number in range(2, 8):
+        stub.add_pull(number, f"2026-01-0{number}T00:00:00Z")
+    _, truncated = watch(stub, state_path)
+    _, resumed = watch(stub, state_path)
+
+    assert numbers(truncated) == [7, 6, 5, 4]
+    assert numbers(resumed) == [3, 2]
+
+
+def test_retry_after_is_retried(tmp_path):
+    stub = StubGitHub()
+    stub.add_pull(1, "2026-01-01T00:00:00Z")
+    stub.throttle_next = 1
+
+    watcher, repository = watch(stub, tmp_path / "state.json")
+
+    assert numbers(repository) == [1]
+    assert stub.requests == [1, 1]
+    assert watcher.stats["errors"] == 0
+
+
+def test_exhausted_rate_limit_defers_repository(tmp_path):
+    stub = StubGitHub()
+    stub.add_pull(1, "2026-01-01T00:00:00Z")
+    stub.core_remaining = 0
+
+    watcher, repository = watch(stub, tmp_path / "state.json")
+
+    assert "deferred" in repository
+    assert watcher.stats["deferred"] == ["o/r"]
+    assert stub.requests == []
+
+
+def test_bucket_wait_does_not_block_other_buckets():
+    budget = RateLimitBudget(reserve=0, max_wait=5)
+    budget.seed({
+        "core": {"limit": 10, "remaining": 10, "reset": time.time() + 60},
+        "search": {"limit": 10, "remaining": 0, "reset": time.time() + 0.3}
+    })
+
+    async def scenario():
+        search = asyncio.create_task(budget.acquire("search"))
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        await budget.acquire("core")
+        core_elapsed = time.monotonic() - started
+        await search
+        return core_elapsed
+
+    assert asyncio.run(scenario()) < 0.1
+    assert budget.buckets["search"]["remaining"] == 9
@@ -0,0 +1,147 @@
+"""Kafka JMX coverage tests: pattern groups, name regexes, shadowing and minimal config narrowing"""
+
+import re
+import textwrap
+
+import pytest
+import yaml
+
+from kafka_coverage_analyzer import JMXRule, KafkaCoverageAnalyzer, capture_groups
+
+
+def jmx_rule(pattern, name=None, labels=None):
+    rule = JMXRule(0, pattern, name, labels or {}, None, regex=re.compile(pattern), groups=capture_groups(pattern))
+    return rule
+
+
+@pytest.mark.parametrize("pattern, bodies", [
+    ("a<name=(.+)><>Count", [".+"]),
+    ("a<name=(.+), topic=(.+)>", [".+", ".+"]),
+    ("a<name=(?:x|y), id=(\\d+)>", ["\\d+"]),
+    ("a<name=(?P<n>\\w+)>", ["?P<n>\\w+"]),
+    ("a<name=((Bytes|Messages)In)>", ["(Bytes|Messages)In", "Bytes|Messages"]),
+    ("a<name=[(]x[)], id=(\\(\\d+\\))>", ["\\(\\d+\\)"]),
+    ("a(?=b)(c)", ["c"]),
+])
+def test_capture_groups(pattern, bodies):
+    assert [body for _, _, body in capture_groups(pattern)] == bodies
+
+
+@pytest.mark.parametrize("pattern, name, lowercase, metric, matches", [
+    ("k<type=T, name=(.+)><>Count", "k_t_$1_total", True, "k_t_messagesin_total", True),
+    ("k<type=T, name=(.+)><>Count", "k_t_$1_total", True, "k_t_messages_in_total", False),
+    ("k<type=T, name=(.+)><>Count", "k_t_$1_total", False, "k_t_MessagesIn_total", True),
+    ("k<type=T, id=(\\d+)><>Value", "k_t_$1", True, "k_t_42", True),
+    ("k<type=T, id=(\\d+)><>Value", "k_t_$1", True, "k_t_x", False),
+    ("k<type=T, name=(Bytes|Messages)In><>Count", "k_t_$1", True, "k_t_bytes", True),
+    ("k<type=T, name=(Bytes|Messages)In><>Count", "k_t_$1", True, "k_t_records", False),
+    ("k<type=(.+), name=(.+)><>Value", "k_$1_$2_$1", True, "k_a_b_a", True),
+    ("k<type=(.+), name=(.+)><>Value", "k_$1_$2_$1", True, "k_a_b_c", False),
+])
+def test_name_regex(tmp_path, pattern, name, lowercase, metric, matches):
+    analyzer = KafkaCoverageAnalyzer(tmp_path)
+    analyzer.lowercase_names = lowercase
+
+    assert bool(analyzer._name_regex(jmx_rule(pattern, name)).fullmatch(metric)) is matches
+
+
+@pytest.mark.parametrize("pattern, sample", [
+    ("kafka.server<type=ReplicaManager, name=(.+)><>Value", "kafka.server<type=ReplicaManager, name=Sample><>Value"),
+    ("k<type=T, id=(\\d+)><>Value", "k<type=T, id=99><>Value"),
+    ("k<type=T, name=(Bytes|Messages)In><>Count", "k<type=T, name=BytesIn><>Count"),
+    ("k<type=T\\.x, name=(.+)>", "k<type=T.x, name=Sample>"),
+])
+def test_sample_bean(pattern, sample):
+    assert jmx_rule(pattern).sample_bean() == sample
+
+
+def monitoring_tree(tmp_path, jmx_config, alerts):
+    (tmp_path / "rules").mkdir()
+    (tmp_path / "kafka-jmx-config.yml").write_text(textwrap.dedent(jmx_config).lstrip())
+    (tmp_path / "rules" / "kafka-alerts.yaml").write_text(textwrap.dedent(alerts).lstrip())
+    return KafkaCoverageAnalyzer(tmp_path)
+
+
+JMX_CONFIG = '''
+    lowercaseOutputName: true
+    lowercaseOutputLabelNames: true
+    whitelistObjectNames:
+      - "kafka.server:type=BrokerTopicMetrics,name=*"
+      - "kafka.server:type=ReplicaManager,name=*"
+      - "kafka.log:type=LogFlushStats,name=*"
+    rules:
+      - pattern: "kafka.server<type=BrokerTopicMetrics, name=(.+)><>Count"
+        name: kafka_server_brokertopicmetrics_$1_total
+        type: COUNTER
+      - pattern: "kafka.server<type=BrokerTopicMetrics, name=(.+), topic=(.+)><>Count"
+        name: kafka_server_brokertopicmetrics_$1_total
+        type: COUNTER
+        labels:
+          topic: "$2"
+      - pattern: "kafka.server<type=ReplicaManager, name=(.+)><>Value"
+        name: kafka_server_replicamanager_$1
+      - pattern: ".*"
+'''
+
+
+def alerts(*exprs):
+    rules = [{"alert": f"A{i}", "expr": expr} for i, expr in enumerate(exprs)]
+    return yaml.safe_dump({"groups": [{"name": "kafka", "rules": rules}]})
+
+
+@pytest.mark.parametrize("exprs, patterns", [
+    (["rate(kafka_server_brokertopicmetrics_messagesin_total[5m]) > 0",
+      "kafka_server_replicamanager_underreplicatedpartitions > 0"],
+     ["kafka.server<type=BrokerTopicMetrics, name=((?i:messagesin))><>Count",
+      "kafka.server<type=ReplicaManager, name=((?i:underreplicatedpartitions))><>Value"]),
+    (["sum(rate(kafka_server_brokertopicmetrics_messagesin_total[5m])) by (topic) > 0"],
+     ["kafka.server<type=BrokerTopicMetrics, name=((?i:messagesin)), topic=(.+)><>Count",
+      "kafka.server<type=BrokerTopicMetrics, name=((?i:messagesin))><>Count"]),
+    (['kafka_server_brokertopicmetrics_bytesin_total{topic="orders"} > 0',
+      "rate(kafka_server_brokertopicmetrics_messagesin_total[5m]) > 0"],
+     ["kafka.server<type=BrokerTopicMetrics, name=((?i:bytesin|messagesin)), topic=(.+)><>Count",
+      "kafka.server<type=BrokerTopicMetrics, name=((?i:bytesin|messagesin))><>Count"]),
+])
+def test_minimal_config_narrows_and_handles_shadowed_rules(tmp_path, exprs, patterns):
+    analyzer = monitoring_tree(tmp_path, JMX_CONFIG, alerts(*exprs))
+
+    report = analyzer.analyze()
+
+    assert [rule["pattern"] for rule in report["minimal_config"]["rules"]] == patterns
+    assert report["catch_all_rules"] == [3]
+
+
+def test_shadowed_rule_reports_decision(tmp_path):
+    analyzer = monitoring_tree(tmp_path, JMX_CONFIG, alerts(
+        "rate(kafka_server_brokertopicmetrics_messagesin_total[5m]) > 0",
+        'kafka_server_brokertopicmetrics_failedfetchrequests_total{topic="orders"} > 0'
+    ))
+
+    shadowed, = analyzer.analyze()["shadowed_rules"]
+
+    assert (shadowed["rule"], shadowed["shadowed_by"]) == (1, 0)
+    assert shadowed["minimal_config"] == "moved_ahead"
+    assert shadowed["labels_needed"] == ["topic"]
+
+
+def test_minimal_config_keeps_used_whitelist_entries(tmp_path):
+    analyzer = monitoring_tree(tmp_path, JMX_CONFIG, alerts("kafka_server_replicamanager_offlinereplicacount > 0"))
+
+    report = analyzer.analyze()
+
+    assert report["minimal_config"]["whitelistObjectNames"] == ["kafka.server:type=ReplicaManager,name=*"]
+    assert "kafka.log:type=LogFlushStats,name=*" in report["unused_whitelist_entries"]
+
+
+def test_invalid_yaml_escapes_are_repaired_and_reported(tmp_path):
+    analyzer = monitoring_tree(tmp_path, '''
+        rules:
+          - pattern: "kafka.network<type=Processor, networkProcessor=(\\d+)><>Value"
+            name: kafka_network_processor_$1_idle
+    ''', alerts("kafka_network_processor_3_idle < 0.2"))
+
+    report = analyzer.analyze()
+
+    assert report["config_errors"]
+    assert report["coverage"]["covered"] == {"kafka_network_processor_3_idle": [0]}
+    assert report["minimal_config"]["rules"][0]["pattern"] == "kafka.network<type=Processor, networkProcessor=(3)><>Value"
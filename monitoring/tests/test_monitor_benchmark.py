@@ -0,0 +1,65 @@
+"""Benchmark baseline comparison tests"""
+
+import pytest
+
+from monitor_benchmark import DEFAULT_TOLERANCES, compare_to_baseline
+
+PARAMS = {"services": 50}
+BASELINE_METRICS = {"wall_seconds": 1.0, "peak_memory_mib": 10.0, "files_read": 100}
+
+
+def results(params=PARAMS, **metrics):
+    return {"profiles": {"small": {"params": params, "results": {
+        "run_monitoring_cycle": dict(BASELINE_METRICS, **metrics)
+    }}}}
+
+
+def entries(comparison, kind):
+    return [(e["target"], e["metric"], e["baseline"], e["current"]) for e in comparison[kind]]
+
+
+@pytest.mark.parametrize("metrics, regressions, improvements", [
+    ({}, [], []),
+    # wall_seconds allows 1.0 * 1.5 + 0.05
+    ({"wall_seconds": 1.55}, [], []),
+    ({"wall_seconds": 1.6}, [("run_monitoring_cycle", "wall_seconds", 1.0, 1.6)], []),
+    ({"wall_seconds": 0.4}, [], [("run_monitoring_cycle", "wall_seconds", 1.0, 0.4)]),
+    # peak_memory_mib allows 10 * 1.25 + 1
+    ({"peak_memory_mib": 13.5}, [], []),
+    ({"peak_memory_mib": 13.6}, [("run_monitoring_cycle", "peak_memory_mib", 10.0, 13.6)], []),
+    # files_read has no tolerance: one more file is a regression, one fewer an improvement
+    ({"files_read": 101}, [("run_monitoring_cycle", "files_read", 100, 101)], []),
+    ({"files_read": 99}, [], [("run_monitoring_cycle", "files_read", 100, 99)]),
+])
+def test_compare_to_baseline(metrics, regressions, improvements):
+    comparison = compare_to_baseline(results(**metrics), dict(results(), tolerances=DEFAULT_TOLERANCES))
+
+    assert entries(comparison, "regressions") == regressions
+    assert entries(comparison, "improvements") == improvements
+    assert comparison["not_compared"] == []
+
+
+@pytest.mark.parametrize("tolerances, regressed", [
+    (None, ["wall_seconds", "files_read"]),
+    ({"files_read": DEFAULT_TOLERANCES["files_read"]}, ["files_read"]),
+    ({"wall_seconds": {"relative": 2.0, "absolute": 0}}, []),
+])
+def test_compare_to_baseline_tolerances(tolerances, regressed):
+    comparison = compare_to_baseline(results(wall_seconds=2.5, files_read=120), results(), tolerances)
+
+    assert [e["metric"] for e in comparison["regressions"]] == regressed
+
+
+@pytest.mark.parametrize("current, baseline, not_compared", [
+    (results(), {}, ["small: no baseline"]),
+    (results(), {"profiles": {"medium": results()["profiles"]["small"]}}, ["small: no baseline"]),
+    (results(params={"services": 500}, files_read=500), results(),
+     ["small: synthetic repository parameters changed"]),
+    ({"profiles": {"small": {"params": PARAMS, "results": {"analyzer:new": BASELINE_METRICS}}}}, results(),
+     ["small analyzer:new: no baseline"]),
+])
+def test_compare_to_baseline_not_compared(current, baseline, not_compared):
+    comparison = compare_to_baseline(current, baseline)
+
+    assert comparison["not_compared"] == not_compared
+    assert comparison["regressions"] == []
@@ -0,0 +1,241 @@
+"""PromQL tokenizer, parser, recording-rule matching and cost report tests"""
+
+import json
+import textwrap
+
+import pytest
+
+from promql_cost_analyzer import (
+    CardinalitySnapshot, PromQLCostAnalyzer, QueryItem, _tokenize, contains_subexpression, normalize_tokens,
+    parse_duration, parse_promql
+)
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("5m", 300.0),
+    ("1h30m", 5400.0),
+    ("250ms", 0.25),
+    ("2d", 172800.0),
+    (None, None),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("expr, kinds", [
+    ("up", ["ident"]),
+    ('rate(http_requests_total{job="api"}[5m])', ["ident", "lparen", "ident", "matchers", "range", "rparen"]),
+    ("a >= 0.5", ["ident", "op", "number"]),
+    ("x offset 1h", ["ident", "ident", "number"]),
+    ('sum(x) # trailing comment', ["ident", "lparen", "ident", "rparen"]),
+    ('label_replace(x, "dst", "$1", "src", "(.*)")',
+     ["ident", "lparen", "ident", "op", "string", "op", "string", "op", "string", "op", "string", "rparen"]),
+])
+def test_tokenize_kinds(expr, kinds):
+    assert [kind for kind, _ in _tokenize(expr)] == kinds
+
+
+def test_tokenize_matchers_keep_braces_inside_strings():
+    (_, matchers), = [t for t in _tokenize('x{path=~"/a{1,2}",code!="5xx"}') if t[0] == "matchers"]
+
+    assert [(m.label, m.op, m.value) for m in matchers] == [("path", "=~", "/a{1,2}"), ("code", "!=", "5xx")]
+
+
+@pytest.mark.parametrize("expr, metrics, functions, ranges", [
+    ("up", ["up"], [[]], [None]),
+    ("rate(x[5m])", ["x"], [["rate"]], [300.0]),
+    ("histogram_quantile(0.95, sum(rate(h_bucket[5m])) by (le))",
+     ["h_bucket"], [["rate", "sum", "histogram_quantile"]], [300.0]),
+    ('{__name__="up", job="a"}', ["up"], [[]], [None]),
+    ("a / on(job) group_left b", ["a", "b"], [[], []], [None, None]),
+    ("max_over_time(rate(x[1m])[1h:5m])", ["x"], [["rate", "max_over_time"]], [60.0]),
+])
+def test_parse_selectors(expr, metrics, functions, ranges):
+    parsed = parse_promql(expr)
+
+    assert [s.metric for s in parsed.selectors] == metrics
+    assert [s.functions for s in parsed.selectors] == functions
+    assert [s.range_seconds for s in parsed.selectors] == ranges
+
+
+def test_parse_subquery():
+    selector, = parse_promql("max_over_time(rate(x[1m])[1h:5m])").selectors
+
+    assert selector.subquery == (3600.0, 300.0)
+
+
+@pytest.mark.parametrize("expr, aggregations", [
+    ("sum(rate(x[5m])) by (job)", [("sum", ["job"], False, True)]),
+    ("sum by (job, instance) (x)", [("sum", ["job", "instance"], False, True)]),
+    ("avg without (pod) (x)", [("avg", ["pod"], True, True)]),
+    ("max(sum(x) by (job))", [("max", [], False, True), ("sum", ["job"], False, False)]),
+    ("topk(5, x)", [("topk", [], False, True)]),
+    ("rate(x[5m])", []),
+])
+def test_parse_aggregations(expr, aggregations):
+    parsed = parse_promql(expr)
+
+    assert [(a.name, a.labels, a.without, a.outermost) for a in parsed.aggregations] == aggregations
+
+
+@pytest.mark.parametrize("query, rule, expected", [
+    ("rate(foo[5m])", "rate(foo[5m])", True),
+    ("irate(foo[5m])", "rate(foo[5m])", False),
+    ("rate(foo[10m])", "rate(foo[5m])", False),
+    ("sum(rate(x[5m]))by(job)", "sum(rate(x[5m]))", False),
+    ("sum(rate(x[5m])) without (pod)", "sum(rate(x[5m]))", False),
+    ("sum(rate(x[5m])) by (job) > 1", "sum(rate(x[5m])) by (job)", True),
+    ("SUM(rate(x[5m])) BY (job)", "sum(rate(x[5m])) by (job)", True),
+    ("sum by (job) (rate(x[5m]))", "rate(x[5m])", True),
+    ("sum(rate(x{b='2',a='1'}[5m]))", "sum(rate(x{a='1',b='2'}[5m]))", True),
+    ("sum(x) / sum(y) > 0.5", "sum(x) / sum(y)", True),
+    ("sum(x) / sum(y) * 100", "sum(x) / sum(y)", False),
+    ("1 - sum(x) / sum(y)", "sum(x) / sum(y)", True),
+    ("(sum(x) + sum(y)) * 2", "sum(x) + sum(y)", True),
+])
+def test_contains_subexpression(query, rule, expected):
+    assert contains_subexpression(normalize_tokens(query), normalize_tokens(rule)) is expected
+
+
+TSDB_STATUS = {"status": "success", "data": {
+    "seriesCountByMetricName": [
+        {"name": "http_requests_total", "value": 1200}, {"name": "node_cpu_seconds_total", "value": 400},
+        {"name": "up", "value": 50}
+    ],
+    "labelValueCountByLabelName": [{"name": "job", "value": 4}, {"name": "code", "value": 5}]
+}}
+
+
+@pytest.mark.parametrize("content, series, label_values", [
+    (TSDB_STATUS, {"http_requests_total": 1200, "node_cpu_seconds_total": 400, "up": 50}, {"job": 4, "code": 5}),
+    ({"series": {"up": 3}, "label_values": {"job": 2}}, {"up": 3}, {"job": 2}),
+    ({"up": "7"}, {"up": 7}, {}),
+    (None, {}, {}),
+])
+def test_snapshot_load(tmp_path, content, series, label_values):
+    path = tmp_path / "tsdb.json"
+    if content is not None:
+        path.write_text(json.dumps(content))
+
+    snapshot = CardinalitySnapshot.load(path)
+
+    assert (snapshot.series, snapshot.label_values) == (series, label_values)
+
+
+@pytest.mark.parametrize("expr, interval, series, samples, flags", [
+    ("http_requests_total", 15.0, 1200, 1200.0, []),
+    ('http_requests_total{job="api"}', 15.0, 300, 300.0, []),
+    ('http_requests_total{code=~"500|502"}', 15.0, 480, 480.0, []),
+    ('http_requests_total{code=~"5[0-9]{2}"}', 15.0, 1200, 1200.0, []),
+    ("rate(http_requests_total[1m])", 15.0, 1200, 4800.0, []),
+    ('rate(http_requests_total{path=~".*admin.*"}[1m])', 15.0, 1200, 4800.0,
+     ['wide_regex:path=~".*admin.*"']),
+    ("max_over_time(rate(up[1m])[1h:5m])", 15.0, 50, 2400.0, ["long_range:up[3600s]@15s"]),
+    ("max_over_time(up[1h])", 60.0, 50, 12000.0, ["long_range:up[3600s]@60s"]),
+    ("absent(unknown_metric)", 15.0, 100, 100.0, []),
+])
+def test_cost_item(tmp_path, expr, interval, series, samples, flags):
+    analyzer = PromQLCostAnalyzer(tmp_path, CardinalitySnapshot({"http_requests_total": 1200, "up": 50},
+                                                                {"job": 4, "code": 5}))
+    item = QueryItem(id="q", kind="alert", file="f", expr=expr, parsed=parse_promql(expr), interval_seconds=interval)
+
+    analyzer.cost_item(item)
+
+    assert (item.series, item.samples_per_evaluation, item.flags) == (series, samples, flags)
+    assert item.samples_per_second == pytest.approx(samples / interval)
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(text).lstrip())
+
+
+@pytest.fixture
+def report(tmp_path):
+    """A small monitoring tree: two rule groups, one dashboard and a TSDB status snapshot"""
+    write(tmp_path / "prometheus.yml", '''
+        global:
+          scrape_interval: 30s
+          evaluation_interval: 1m
+        scrape_configs:
+          - job_name: api
+            scrape_interval: 15s
+          - job_name: node
+    ''')
+    write(tmp_path / "rules" / "app.yaml", '''
+        groups:
+          - name: app
+            interval: 1m
+            rules:
+              - record: job:http_requests:rate5m
+                expr: sum(rate(http_requests_total{job="api"}[5m])) by (job)
+              - record: cluster:http_requests:rate5m
+                expr: sum(job:http_requests:rate5m)
+              - record: job:node_cpu:rate5m
+                expr: sum(rate(node_cpu_seconds_total[5m])) by (job)
+              - alert: HighRequestRate
+                expr: job:http_requests:rate5m > 100
+          - name: fast
+            interval: 15s
+            rules:
+              - alert: NoRequests
+                expr: job:http_requests:rate5m < 1
+              - alert: ErrorRatio
+                expr: job:http_errors:ratio5m > 0.05
+              - alert: AdminTraffic
+                expr: rate(http_requests_total{path=~".*admin.*"}[5m]) > 0
+    ''')
+    write(tmp_path / "grafana" / "api.json", json.dumps({
+        "refresh": "30s",
+        "time": {"from": "now-1h", "to": "now"},
+        "panels": [{"title": "Requests", "targets": [
+            {"refId": "A", "expr": 'sum(rate(http_requests_total{job="api"}[5m])) BY (job)'},
+            {"refId": "B", "expr": "rate(http_requests_total[5m])"},
+            {"refId": "C", "expr": "max_over_time(up[1d])", "instant": True}
+        ]}]
+    }))
+    write(tmp_path / "tsdb.json", json.dumps(TSDB_STATUS))
+
+    return PromQLCostAnalyzer(tmp_path, CardinalitySnapshot.load(tmp_path / "tsdb.json")).analyze()
+
+
+def test_report_ranks_by_samples_per_second(report):
+    # Dashboards pay for every range point at each refresh: 1h / 30s step = 120 points every 30s
+    assert [(c["id"], c["samples_per_second"]) for c in report["top_costs"][:5]] == [
+        ("grafana/api.json:Requests#B", 48000.0),
+        ("grafana/api.json:Requests#A", 24000.0),
+        ("grafana/api.json:Requests#C", 4800.0),
+        ("rules/app.yaml:fast:AdminTraffic", 800.0),
+        ("rules/app.yaml:app:job:http_requests:rate5m", 100.0),
+    ]
+    assert report["expressions"] == {"recording_rule": 3, "alert": 4, "dashboard_query": 3}
+    assert report["scrape_interval_seconds"] == 30.0
+
+
+def test_report_flags(report):
+    assert report["wide_regex_selectors"] == ["rules/app.yaml:fast:AdminTraffic"]
+    assert report["long_range_high_frequency"] == ["grafana/api.json:Requests#C"]
+
+
+def test_report_dependency_graph(report):
+    graph = report["dependency_graph"]
+
+    assert graph["edges"] == {
+        "cluster:http_requests:rate5m": ["job:http_requests:rate5m"],
+        "rules/app.yaml:app:HighRequestRate": ["job:http_requests:rate5m"],
+        "rules/app.yaml:fast:NoRequests": ["job:http_requests:rate5m"],
+    }
+    assert graph["max_depth"] == 2
+    assert graph["unused_recording_rules"] == ["cluster:http_requests:rate5m", "job:node_cpu:rate5m"]
+    assert graph["undefined_recorded_metrics"] == ["job:http_errors:ratio5m"]
+    assert graph["interval_mismatches"] == [{
+        "rule": "rules/app.yaml:fast:NoRequests", "interval_seconds": 15.0,
+        "input": "job:http_requests:rate5m", "input_interval_seconds": 60.0
+    }]
+
+
+def test_report_recording_rule_candidates(report):
+    assert report["recording_rule_candidates"] == [
+        {"query": "grafana/api.json:Requests#A", "match": "exact", "recording_rules": ["job:http_requests:rate5m"]},
+        {"query": "grafana/api.json:Requests#B", "match": "partial", "recording_rules": ["job:http_requests:rate5m"]},
+    ]